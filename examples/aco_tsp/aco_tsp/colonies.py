@@ -0,0 +1,151 @@
+"""Run several ant colonies side by side, one process each, with periodic migration.
+
+Every colony is an independent ``AcoTspModel`` with its own seed and alpha/beta values.
+After every ``migration_interval`` iterations the colonies report back and exchange
+information, either by laying pheromone along the best tour found by any colony
+(``migration="best_tour"``) or by all adopting the mean of their pheromone matrices
+(``migration="pheromone"``, requires a dense ``TSPGraph``).
+"""
+
+import multiprocessing as mp
+import multiprocessing.connection
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .model import AcoTspModel, TSPGraph
+
+
+@dataclass
+class MultiColonyResult:
+    best_distance: float
+    best_path: list
+    # Colony index -> best distance found so far by that colony, per iteration
+    traces: dict[int, list[float]] = field(default_factory=dict)
+    # Colony index -> the model parameters it ran with
+    colony_params: dict[int, dict] = field(default_factory=dict)
+
+
+def _run_colony(connection, tsp_graph: TSPGraph, model_params: dict):
+    """Worker loop: apply incoming migrations, then step the colony as asked."""
+    model = AcoTspModel(tsp_graph=tsp_graph, **model_params)
+    while True:
+        command, payload, num_steps = connection.recv()
+        if command == "stop":
+            break
+        if command == "best_tour":
+            tour, distance = payload
+            model.reinforce_tour(tour, distance)
+        elif command == "pheromone":
+            model.tsp_graph.pheromone = payload
+
+        trace = []
+        for _ in range(num_steps):
+            model.step()
+            trace.append(model.best_distance)
+        pheromone = model.tsp_graph.pheromone if model.tsp_graph.dense else None
+        connection.send((trace, model.best_distance, model.best_path, pheromone))
+    connection.close()
+
+
+def _receive(connection, process):
+    """Wait for a colony's report, failing instead of hanging if its process died."""
+    mp.connection.wait([connection, process.sentinel])
+    if not connection.poll():
+        raise RuntimeError(f"Colony process exited with code {process.exitcode}")
+    return connection.recv()
+
+
+def make_colony_params(
+    num_colonies: int,
+    alphas=None,
+    betas=None,
+    seed: int = 0,
+) -> list[dict]:
+    """Give each colony its own seed and alpha/beta values.
+
+    By default all colonies use alpha=1 and spread beta between 2 and 5, so some
+    colonies follow the pheromone more and others the closest cities.
+    """
+    if alphas is None:
+        alphas = [1.0] * num_colonies
+    if betas is None:
+        betas = np.linspace(2.0, 5.0, num_colonies).tolist()
+    return [
+        {"ant_alpha": alpha, "ant_beta": beta, "seed": seed + i}
+        for i, (alpha, beta) in enumerate(zip(alphas, betas))
+    ]
+
+
+def run_colonies(
+    tsp_graph: TSPGraph,
+    num_colonies: int | None = None,
+    num_iterations: int = 50,
+    migration_interval: int = 5,
+    migration: str = "best_tour",
+    colony_params: list[dict] | None = None,
+    **model_params,
+) -> MultiColonyResult:
+    """Run ``num_colonies`` colonies in parallel and return the overall best tour.
+
+    Args:
+        tsp_graph: The instance to solve; every colony works on its own copy.
+        num_colonies: Number of colonies, defaults to the number of CPU cores.
+        num_iterations: Number of model steps each colony runs in total.
+        migration_interval: Number of steps between two migrations.
+        migration: ``"best_tour"``, ``"pheromone"`` or ``None`` for independent runs.
+        colony_params: Per-colony model parameters, see ``make_colony_params``.
+        **model_params: Model parameters shared by all colonies, e.g. ``num_agents``.
+    """
+    if migration == "pheromone" and not tsp_graph.dense:
+        raise ValueError("Pheromone migration requires a dense TSPGraph")
+    if colony_params is None:
+        colony_params = make_colony_params(num_colonies or mp.cpu_count())
+
+    connections = []
+    processes = []
+    for params in colony_params:
+        parent, child = mp.Pipe()
+        process = mp.Process(
+            target=_run_colony,
+            args=(child, tsp_graph, {**model_params, **params}),
+        )
+        process.start()
+        connections.append(parent)
+        processes.append(process)
+
+    result = MultiColonyResult(
+        best_distance=float("inf"),
+        best_path=None,
+        traces={i: [] for i in range(len(colony_params))},
+        colony_params=dict(enumerate(colony_params)),
+    )
+    command, payload = "run", None
+    try:
+        for start in range(0, num_iterations, migration_interval):
+            num_steps = min(migration_interval, num_iterations - start)
+            for connection in connections:
+                connection.send((command, payload, num_steps))
+
+            pheromones = []
+            for i, (connection, process) in enumerate(zip(connections, processes)):
+                trace, best_distance, best_path, pheromone = _receive(
+                    connection, process
+                )
+                result.traces[i].extend(trace)
+                pheromones.append(pheromone)
+                if best_distance < result.best_distance:
+                    result.best_distance = best_distance
+                    result.best_path = best_path
+
+            if migration == "best_tour":
+                command, payload = "best_tour", (result.best_path, result.best_distance)
+            elif migration == "pheromone":
+                command, payload = "pheromone", np.mean(pheromones, axis=0)
+    finally:
+        for connection, process in zip(connections, processes):
+            if process.is_alive():
+                connection.send(("stop", None, 0))
+            process.join()
+
+    return result
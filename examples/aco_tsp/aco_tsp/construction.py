@@ -0,0 +1,77 @@
+import numpy as np
+
+
+def construct_tours(
+    tsp_graph,
+    start: np.ndarray,
+    alpha: float,
+    beta: float,
+    rng: np.random.Generator,
+    local_update=None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Build one tour per ant, all ants moving together.
+
+    Every ant keeps a row in a boolean ``visited`` mask. At each move, the rows of
+    the pheromone^alpha * visibility^beta matrix for the ants' current cities are
+    masked by ``visited`` and used as (unnormalized) transition probabilities. One
+    uniform draw per ant from ``rng`` then selects the next city, so the tours only
+    depend on the state of ``rng`` and are reproducible for a fixed seed.
+
+    An ant whose row has no weight left, e.g. because its whole candidate list has
+    been visited, moves to the closest unvisited city instead.
+
+    Args:
+        tsp_graph: A ``TSPGraph`` built with ``dense=True``.
+        start: Index of the starting city of each ant.
+        alpha: Pheromone exponent.
+        beta: Visibility (heuristic) exponent.
+        rng: Random number generator, usually ``model.rng``.
+        local_update: Optional ``local_update(tsp_graph, i, j)`` called after every
+            move with the edges just walked, e.g. ``AntColonySystem.local_update``.
+
+    Returns:
+        The tours as a ``num_ants x num_cities`` array of city indices and the
+        distance traveled by each ant.
+    """
+    num_ants = len(start)
+    num_cities = tsp_graph.num_cities
+    ants = np.arange(num_ants)
+    weights = tsp_graph.pheromone**alpha * tsp_graph.visibility**beta
+
+    tours = np.empty((num_ants, num_cities), dtype=np.intp)
+    tours[:, 0] = start
+    visited = np.zeros((num_ants, num_cities), dtype=bool)
+    visited[ants, start] = True
+    distances = np.zeros(num_ants)
+
+    current = tours[:, 0]
+    for move in range(1, num_cities):
+        # p_ij(t) = 1/Z*[(tau_ij)**alpha * (1/distance)**beta], j not yet visited
+        probabilities = weights[current]
+        probabilities[visited] = 0.0
+        cumulative = np.cumsum(probabilities, axis=1)
+        total = cumulative[:, -1]
+
+        draws = rng.random(num_ants) * total
+        next_city = np.argmax(cumulative > draws[:, np.newaxis], axis=1)
+
+        stuck = total <= 0.0
+        if stuck.any():
+            remaining = np.where(
+                visited[stuck], np.inf, tsp_graph.distance[current[stuck]]
+            )
+            next_city[stuck] = np.argmin(remaining, axis=1)
+
+        distances += tsp_graph.distance[current, next_city]
+        visited[ants, next_city] = True
+        tours[:, move] = next_city
+        if local_update is not None:
+            local_update(tsp_graph, current, next_city)
+            for i, j in ((current, next_city), (next_city, current)):
+                weights[i, j] = (
+                    tsp_graph.pheromone[i, j] ** alpha
+                    * tsp_graph.visibility[i, j] ** beta
+                )
+        current = next_city
+
+    return tours, distances
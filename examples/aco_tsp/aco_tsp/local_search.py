@@ -0,0 +1,146 @@
+"""2-opt and Or-opt improvement of the tours constructed by the ants.
+
+Tours in this example are open paths: an ant visits every city once and does not
+return to its start. Both moves are applied to a closed cycle instead, made by adding
+a dummy city at distance zero from all others in front of the path; the cycle length
+then equals the path length and the dummy city never moves.
+
+Each improvement step evaluates all candidate moves at once as a matrix of distance
+deltas taken from the distance matrix, and applies the best one. Both moves assume a
+symmetric distance matrix.
+"""
+
+import numpy as np
+
+# Moves have to improve the tour by more than this to be applied
+TOLERANCE = 1e-9
+
+
+def extend_distance(distance: np.ndarray) -> np.ndarray:
+    """Add the dummy city (last row and column) used to close open paths."""
+    num_cities = len(distance)
+    extended = np.zeros((num_cities + 1, num_cities + 1))
+    extended[:num_cities, :num_cities] = distance
+    return extended
+
+
+def tour_length(tour: np.ndarray, distance: np.ndarray) -> float:
+    """Length of an open path through the distance matrix."""
+    return float(distance[tour[:-1], tour[1:]].sum())
+
+
+def two_opt_move(cycle: np.ndarray, distance: np.ndarray) -> bool:
+    """Apply the best 2-opt move to ``cycle`` in place; return whether one was found."""
+    num_nodes = len(cycle)
+    successor = np.roll(cycle, -1)
+    edge = distance[cycle, successor]
+    # Replace edges (c_i, c_i+1) and (c_j, c_j+1) by (c_i, c_j) and (c_i+1, c_j+1)
+    delta = (
+        distance[cycle[:, np.newaxis], cycle]
+        + distance[successor[:, np.newaxis], successor]
+        - edge[:, np.newaxis]
+        - edge
+    )
+    # Only i < j - 1 give a new tour; i=0, j=n-1 are adjacent edges of the cycle
+    delta[np.tril_indices(num_nodes, k=1)] = np.inf
+    delta[0, num_nodes - 1] = np.inf
+
+    i, j = np.unravel_index(np.argmin(delta), delta.shape)
+    if delta[i, j] >= -TOLERANCE:
+        return False
+    cycle[i + 1 : j + 1] = cycle[i + 1 : j + 1][::-1]
+    return True
+
+
+def or_opt_move(
+    cycle: np.ndarray, distance: np.ndarray, segment_lengths=(1, 2, 3)
+) -> tuple[np.ndarray, bool]:
+    """Apply the best Or-opt move, relocating a short segment elsewhere in ``cycle``.
+
+    Segments may be reinserted in either direction. Position 0 (the dummy city) is
+    never part of a moved segment.
+    """
+    num_nodes = len(cycle)
+    successor = np.roll(cycle, -1)
+    edge = distance[cycle, successor]
+    targets = np.arange(num_nodes)
+
+    best = (-TOLERANCE, None)
+    for length in segment_lengths:
+        starts = np.arange(1, num_nodes - length + 1)
+        if len(starts) == 0:
+            continue
+        first = cycle[starts]
+        last = cycle[starts + length - 1]
+        before = cycle[starts - 1]
+        after = cycle[(starts + length) % num_nodes]
+        removal_gain = (
+            distance[before, first] + distance[last, after] - distance[before, after]
+        )
+
+        # Insert between c_e and c_e+1, in forward or reversed orientation
+        forward = (
+            distance[cycle[np.newaxis, :], first[:, np.newaxis]]
+            + distance[last[:, np.newaxis], successor[np.newaxis, :]]
+        )
+        reverse = (
+            distance[cycle[np.newaxis, :], last[:, np.newaxis]]
+            + distance[first[:, np.newaxis], successor[np.newaxis, :]]
+        )
+        reversed_is_better = reverse < forward
+        insertion = np.minimum(forward, reverse) - edge[np.newaxis, :]
+        delta = insertion - removal_gain[:, np.newaxis]
+        # Edges touching the segment are not insertion points
+        touching = (targets >= starts[:, np.newaxis] - 1) & (
+            targets <= starts[:, np.newaxis] + length - 1
+        )
+        delta[touching] = np.inf
+
+        s, e = np.unravel_index(np.argmin(delta), delta.shape)
+        if delta[s, e] < best[0]:
+            best = (delta[s, e], (starts[s], length, e, reversed_is_better[s, e]))
+
+    if best[1] is None:
+        return cycle, False
+    start, length, target, reverse_segment = best[1]
+    segment = cycle[start : start + length]
+    if reverse_segment:
+        segment = segment[::-1]
+    rest = np.concatenate([cycle[:start], cycle[start + length :]])
+    position = np.flatnonzero(rest == cycle[target])[0] + 1
+    return np.concatenate([rest[:position], segment, rest[position:]]), True
+
+
+def improve_tour(
+    tour: np.ndarray,
+    extended_distance: np.ndarray,
+    or_opt: bool = False,
+    max_moves: int | None = None,
+) -> tuple[np.ndarray, float]:
+    """Improve an open path with 2-opt (and Or-opt) moves until none improves it.
+
+    Args:
+        tour: City indices of the path.
+        extended_distance: Distance matrix from ``extend_distance``.
+        or_opt: Also try Or-opt moves once 2-opt is exhausted.
+        max_moves: Stop after this many moves; ``None`` runs to a local optimum.
+
+    Returns:
+        The improved path and its length.
+    """
+    dummy = len(extended_distance) - 1
+    cycle = np.concatenate([[dummy], tour])
+    moves = 0
+    while max_moves is None or moves < max_moves:
+        if two_opt_move(cycle, extended_distance):
+            moves += 1
+            continue
+        if or_opt:
+            cycle, moved = or_opt_move(cycle, extended_distance)
+            if moved:
+                moves += 1
+                continue
+        break
+
+    tour = cycle[1:]
+    return tour, tour_length(tour, extended_distance)
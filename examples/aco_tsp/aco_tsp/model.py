@@ -1,28 +1,58 @@
-from dataclasses import dataclass
+import itertools
+from collections import deque
 
 import mesa
 import networkx as nx
 import numpy as np
 from mesa.experimental.cell_space import CellAgent, Network
+from scipy.spatial import cKDTree
 
-
-@dataclass
-class NodeCoordinates:
-    city: int
-    x: float
-    y: float
-
-    @classmethod
-    def from_line(cls, line: str):
-        city, x, y = line.split()
-        return cls(int(city), float(x), float(y))
+from .construction import construct_tours
+from .local_search import extend_distance, improve_tour
+from .pheromone import AntSystem
+from .tsplib import EUCLIDEAN_METRICS, TSPInstance, load_tsplib
 
 
 class TSPGraph:
-    def __init__(self, g: nx.Graph, pheromone_init: float = 1e-6):
+    """Cities and the edges between them.
+
+    By default, distance, visibility and pheromone are stored as edge attributes
+    of the networkx graph. With ``dense=True`` they are instead held as
+    ``num_cities x num_cities`` NumPy arrays indexed by position in ``nodes``,
+    so that pheromone updates become whole-array operations. In that mode the
+    networkx graph only describes the topology; call ``graph_view()`` to copy
+    the current pheromone levels onto its edges, e.g. for visualization.
+
+    With ``k_nearest`` set, each city is only connected to its ``k_nearest``
+    closest cities (its candidate list) instead of to every other city, so the
+    graph has ``num_cities * k_nearest`` rather than ``num_cities**2`` edges.
+
+    Distances are Euclidean distances between the ``pos`` of the cities, unless a
+    TSPLIB ``instance`` (with its cities in the order of ``g.nodes``) is given. Its
+    metric is then used, computed only for the edges of the graph unless the graph
+    is dense, so a sparse graph of a coordinate instance never holds a
+    ``num_cities x num_cities`` matrix.
+    """
+
+    def __init__(
+        self,
+        g: nx.Graph,
+        pheromone_init: float = 1e-6,
+        dense: bool = False,
+        k_nearest: int | None = None,
+        instance: TSPInstance | None = None,
+    ):
         self.g = g
         self.pheromone_init = pheromone_init
-        self._add_edge_properties()
+        self.dense = dense
+        self.k_nearest = k_nearest
+        self.instance = instance
+        self.nodes = list(g.nodes)
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        if self.dense:
+            self._add_matrices()
+        else:
+            self._add_edge_properties()
 
     @property
     def pos(self):
@@ -36,46 +66,197 @@ class TSPGraph:
     def num_cities(self):
         return len(self.g.nodes)
 
+    @property
+    def num_edges(self):
+        return self.g.number_of_edges()
+
+    @property
+    def matrix_nbytes(self) -> int:
+        """Bytes held by ``num_cities x num_cities`` arrays.
+
+        These are the arrays of a dense graph, which do not shrink with
+        ``k_nearest`` since the distances between all cities are kept so that ants
+        can leave their candidate lists, and the distance matrix of an EXPLICIT
+        TSPLIB instance.
+        """
+        matrices = []
+        if self.dense:
+            matrices += [self.adjacency, self.distance, self.visibility, self.pheromone]
+        explicit = None if self.instance is None else self.instance.explicit_distance
+        if explicit is not None and not any(m is explicit for m in matrices):
+            matrices.append(explicit)
+        return sum(matrix.nbytes for matrix in matrices)
+
+    def edges_skipped(self) -> float:
+        """Fraction of the edges of a complete graph that are not in the networkx graph.
+
+        This only counts networkx edges, not bytes; see ``matrix_nbytes`` for the
+        arrays of a dense graph.
+        """
+        num_cities = self.num_cities
+        complete = num_cities * (num_cities - 1)
+        if not self.g.is_directed():
+            complete //= 2
+        return 1 - self.num_edges / complete if complete else 0.0
+
+    def distance_between(self, u, v) -> float:
+        """Distance between two cities, whether or not they share an edge."""
+        if self.dense:
+            return self.distance[self.node_index[u], self.node_index[v]]
+        if self.g.has_edge(u, v):
+            return self.g[u][v]["distance"]
+        if self.instance is not None:
+            return float(
+                self.instance.distances(self.node_index[u], self.node_index[v])
+            )
+        (u_x, u_y), (v_x, v_y) = self.g.nodes[u]["pos"], self.g.nodes[v]["pos"]
+        return ((u_x - v_x) ** 2 + (u_y - v_y) ** 2) ** 0.5
+
     def _add_edge_properties(self):
+        if self.instance is not None:
+            edges = list(self.g.edges())
+            node_index = self.node_index
+            distances = self.instance.distances(
+                np.array([node_index[u] for u, _ in edges], dtype=np.intp),
+                np.array([node_index[v] for _, v in edges], dtype=np.intp),
+            )
+            for (u, v), distance in zip(edges, distances.tolist()):
+                self.g[u][v]["distance"] = distance
         for u, v in self.g.edges():
-            u_x, u_y = self.g.nodes[u]["pos"]
-            v_x, v_y = self.g.nodes[v]["pos"]
-            self.g[u][v]["distance"] = ((u_x - v_x) ** 2 + (u_y - v_y) ** 2) ** 0.5
+            if self.instance is None:
+                u_x, u_y = self.g.nodes[u]["pos"]
+                v_x, v_y = self.g.nodes[v]["pos"]
+                self.g[u][v]["distance"] = ((u_x - v_x) ** 2 + (u_y - v_y) ** 2) ** 0.5
             self.g[u][v]["visibility"] = 1 / self.g[u][v]["distance"]
             self.g[u][v]["pheromone"] = self.pheromone_init
 
-    @classmethod
-    def from_random(cls, num_cities: int, seed: int = 0) -> "TSPGraph":
-        g = nx.random_geometric_graph(num_cities, 2.0, seed=seed).to_directed()
+    def _add_matrices(self):
+        self.adjacency = nx.to_numpy_array(self.g, nodelist=self.nodes, weight=None) > 0
+        # Keep the distance between all cities, so ants can leave their candidate list
+        if self.instance is not None:
+            self.distance = np.asarray(self.instance.distance_matrix(), dtype=float)
+        else:
+            coords = np.array(
+                [self.g.nodes[node]["pos"] for node in self.nodes], dtype=float
+            )
+            diff = coords[:, np.newaxis, :] - coords[np.newaxis, :, :]
+            self.distance = np.sqrt((diff**2).sum(axis=-1))
+        self.visibility = np.zeros_like(self.distance)
+        np.divide(1.0, self.distance, out=self.visibility, where=self.adjacency)
+        self.pheromone = np.where(self.adjacency, self.pheromone_init, 0.0)
+
+    def reset_pheromone(self):
+        """Set the pheromone on every edge back to ``pheromone_init``."""
+        if self.dense:
+            self.pheromone = np.where(self.adjacency, self.pheromone_init, 0.0)
+        else:
+            self._add_edge_properties()
+
+    def get_pheromone(self, u, v) -> float:
+        if self.dense:
+            return self.pheromone[self.node_index[u], self.node_index[v]]
+        return self.g[u][v]["pheromone"]
+
+    def tour_indices(self, tour) -> np.ndarray:
+        """Map a list of city labels to their row/column indices in the matrices."""
+        return np.fromiter((self.node_index[city] for city in tour), dtype=np.intp)
+
+    def graph_view(self) -> nx.Graph:
+        """Return the networkx graph with up-to-date pheromone edge attributes."""
+        if self.dense:
+            for u, v in self.g.edges():
+                self.g[u][v]["pheromone"] = self.get_pheromone(u, v)
+        return self.g
+
+    def with_candidate_lists(self, k_nearest: int) -> "TSPGraph":
+        """Return a copy of this graph restricted to the k nearest neighbours."""
+        g = self.g.__class__()
+        g.add_nodes_from(self.g.nodes(data=True))
+        self._add_candidate_edges(g, k_nearest, self.instance)
+        return self.__class__(
+            g, self.pheromone_init, self.dense, k_nearest, self.instance
+        )
 
-        return cls(g)
+    @staticmethod
+    def nearest_neighbors(coords: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the ``k`` nearest other points of each point, closest first."""
+        num_points = len(coords)
+        k = min(k, num_points - 1)
+        _, neighbors = cKDTree(coords).query(coords, k=k + 1)
+        neighbors = neighbors.reshape(num_points, k + 1)
+        # Drop each point itself, or the farthest hit if duplicates pushed it out
+        own = neighbors == np.arange(num_points)[:, np.newaxis]
+        own[~own.any(axis=1), -1] = True
+        return neighbors[~own].reshape(num_points, k)
 
     @classmethod
-    def from_tsp_file(cls, file_path: str) -> "TSPGraph":
-        with open(file_path) as f:
-            lines = f.readlines()
-            # Skip lines until reach the text "NODE_COORD_SECTION"
-            while lines.pop(0).strip() != "NODE_COORD_SECTION":
-                pass
-
-            g = nx.Graph()
-            for line in lines:
-                if line.strip() == "EOF":
-                    break
-                node_coordinate = NodeCoordinates.from_line(line)
-
-                g.add_node(
-                    node_coordinate.city, pos=(node_coordinate.x, node_coordinate.y)
-                )
+    def _add_candidate_edges(
+        cls, g: nx.Graph, k_nearest: int, instance: TSPInstance | None = None
+    ):
+        nodes = list(g.nodes)
+        if instance is not None and instance.edge_weight_type in EUCLIDEAN_METRICS:
+            neighbors = cls.nearest_neighbors(instance.coords, k_nearest)
+        elif instance is not None:
+            # Other metrics (GEO, EXPLICIT) are ranked by the distances themselves
+            neighbors = instance.nearest_neighbors(k_nearest)
+        else:
+            coords = np.array([g.nodes[node]["pos"] for node in nodes], dtype=float)
+            neighbors = cls.nearest_neighbors(coords, k_nearest)
+        g.add_edges_from(
+            (nodes[i], nodes[j]) for i, row in enumerate(neighbors) for j in row
+        )
 
-        # Add edges between all nodes to make a complete graph
-        for u in g.nodes():
-            for v in g.nodes():
-                if u == v:
-                    continue
-                g.add_edge(u, v)
+    @classmethod
+    def from_random(
+        cls,
+        num_cities: int,
+        seed: int = 0,
+        dense: bool = False,
+        k_nearest: int | None = None,
+    ) -> "TSPGraph":
+        if k_nearest is None:
+            g = nx.random_geometric_graph(num_cities, 2.0, seed=seed).to_directed()
+        else:
+            # Same city positions as above, but without the edges
+            g = nx.random_geometric_graph(num_cities, 0.0, seed=seed).to_directed()
+            g.remove_edges_from(list(g.edges()))
+            cls._add_candidate_edges(g, k_nearest)
+
+        return cls(g, dense=dense, k_nearest=k_nearest)
 
-        return cls(g)
+    @classmethod
+    def from_tsp_file(
+        cls,
+        file_path: str,
+        dense: bool = False,
+        k_nearest: int | None = None,
+        cache: bool = True,
+    ) -> "TSPGraph":
+        """Load a TSPLIB instance, see ``tsplib.load_tsplib``.
+
+        Distances follow the instance's EDGE_WEIGHT_TYPE. Instances without
+        coordinates (EXPLICIT without display data) get a circular layout for drawing.
+        """
+        instance = load_tsplib(file_path, cache=cache)
+        nodes = instance.node_ids.tolist()
+        if len(instance.coords):
+            pos = {node: tuple(xy) for node, xy in zip(nodes, instance.coords.tolist())}
+        else:
+            pos = nx.circular_layout(nodes)
+
+        # Only asymmetric (EXPLICIT FULL_MATRIX) instances need a directed graph
+        symmetric = instance.symmetric
+        g = nx.Graph() if symmetric else nx.DiGraph()
+        g.add_nodes_from((node, {"pos": pos[node]}) for node in nodes)
+        if k_nearest is not None:
+            cls._add_candidate_edges(g, k_nearest, instance)
+        elif symmetric:
+            # Add edges between all nodes to make a complete graph
+            g.add_edges_from(itertools.combinations(nodes, 2))
+        else:
+            g.add_edges_from(itertools.permutations(nodes, 2))
+
+        return cls(g, dense=dense, k_nearest=k_nearest, instance=instance)
 
 
 class AntTSP(CellAgent):
@@ -91,6 +272,7 @@ class AntTSP(CellAgent):
         self.tsp_solution = []
         self.tsp_distance = 0
         self.graph = self.model.grid.G
+        self.tsp_graph = self.model.tsp_graph
 
     def calculate_pheromone_delta(self, q: float = 100):
         results = {}
@@ -103,9 +285,17 @@ class AntTSP(CellAgent):
     def move_to(self, cell) -> None:
         self._cities_visited.append(cell)
         if self.cell:
-            self._traveled_distance += self.graph[self.cell.coordinate][
-                cell.coordinate
-            ]["distance"]
+            if self.tsp_graph.dense:
+                node_index = self.tsp_graph.node_index
+                i, j = node_index[self.cell.coordinate], node_index[cell.coordinate]
+                self._traveled_distance += self.tsp_graph.distance[i, j]
+                strategy = self.model.pheromone_strategy
+                if strategy is not None and strategy.has_local_update:
+                    strategy.local_update(self.tsp_graph, i, j)
+            else:
+                self._traveled_distance += self.tsp_graph.distance_between(
+                    self.cell.coordinate, cell.coordinate
+                )
         super().move_to(cell)
 
     def decide_next_city(self):
@@ -115,20 +305,28 @@ class AntTSP(CellAgent):
         neighbors = self.cell.neighborhood
         candidates = [n for n in neighbors if n not in self._cities_visited]
         if len(candidates) == 0:
-            return self.cell
+            return self.nearest_unvisited_city()
 
         # p_ij(t) = 1/Z*[(tau_ij)**alpha * (1/distance)**beta]
-        results = []
-        for city in candidates:
-            val = (
-                (self.graph[self.cell.coordinate][city.coordinate]["pheromone"])
-                ** self.alpha
-                * (self.graph[self.cell.coordinate][city.coordinate]["visibility"])
-                ** self.beta
+        if self.tsp_graph.dense:
+            i = self.tsp_graph.node_index[self.cell.coordinate]
+            j = self.tsp_graph.tour_indices(city.coordinate for city in candidates)
+            results = (
+                self.tsp_graph.pheromone[i, j] ** self.alpha
+                * self.tsp_graph.visibility[i, j] ** self.beta
             )
-            results.append(val)
+        else:
+            results = []
+            for city in candidates:
+                val = (
+                    (self.graph[self.cell.coordinate][city.coordinate]["pheromone"])
+                    ** self.alpha
+                    * (self.graph[self.cell.coordinate][city.coordinate]["visibility"])
+                    ** self.beta
+                )
+                results.append(val)
 
-        results = np.array(results)
+            results = np.array(results)
         norm = results.sum()
         results /= norm
 
@@ -136,6 +334,28 @@ class AntTSP(CellAgent):
 
         return new_city
 
+    def nearest_unvisited_city(self):
+        """Fall back to the full set of cities once the candidate list is exhausted.
+
+        Outside the candidate list all edges carry the initial pheromone, so the
+        most attractive city is simply the closest one.
+        """
+        if self.tsp_graph.k_nearest is None:
+            return self.cell
+        unvisited = [
+            cell
+            for cell in self.model.grid.all_cells
+            if cell is not self.cell and cell not in self._cities_visited
+        ]
+        if len(unvisited) == 0:
+            return self.cell
+        return min(
+            unvisited,
+            key=lambda city: self.tsp_graph.distance_between(
+                self.cell.coordinate, city.coordinate
+            ),
+        )
+
     def step(self):
         """Modify this method to change what an individual agent will do during each step.
         Can include logic based on neighbors states.
@@ -161,6 +381,29 @@ class AcoTspModel(mesa.Model):
 
     There is only one model-level parameter: how many agents the model contains. When a new model
     is started, we want it to populate itself with the given number of agents.
+
+    With ``construction="batched"`` the ants do not walk the network one by one; instead all
+    tours are built together by ``construct_tours`` using the model's ``rng``. This requires a
+    ``TSPGraph`` with ``dense=True`` and gives the same tours for the same ``seed``.
+
+    ``k_nearest`` restricts every city to a candidate list of its k nearest neighbours
+    (see ``TSPGraph.with_candidate_lists``); ants only leave the list once all of its
+    cities have been visited.
+
+    ``local_search`` improves tours with 2-opt (plus Or-opt if ``or_opt`` is set) before
+    they are used to update the pheromone: either only the best tour of each iteration
+    (``"iteration_best"``) or the tours of all ants (``"all"``). It needs batched
+    construction and a dense ``TSPGraph`` with a symmetric distance matrix.
+
+    With ``data_collection="compact"`` the DataCollector only records distances; the tours
+    are then kept in ``best_tours``, which gets a ``(step, distance, path)`` entry each time
+    the global best improves. ``tour_history=K`` additionally keeps the tours of all ants
+    for the last K iterations in ``tour_history``, as ``num_ants x num_cities`` arrays of
+    city indices.
+
+    ``pheromone_strategy`` replaces the default Ant System update (q=100, ro=0.5) by one of
+    the rules in ``aco_tsp.pheromone``, e.g. ``MaxMinAntSystem()``. It needs a dense
+    ``TSPGraph``.
     """
 
     def __init__(
@@ -170,9 +413,46 @@ class AcoTspModel(mesa.Model):
         ant_alpha: float = 1.0,
         ant_beta: float = 5.0,
         tsp_graph: TSPGraph = TSP_GRAPH,
+        construction: str = "agent",
+        k_nearest: int | None = None,
+        local_search: str | None = None,
+        or_opt: bool = False,
+        data_collection: str = "full",
+        tour_history: int | None = None,
+        pheromone_strategy=None,
+        seed=None,
     ):
-        super().__init__()
+        super().__init__(seed=seed)
+        if k_nearest is not None and tsp_graph.k_nearest != k_nearest:
+            tsp_graph = tsp_graph.with_candidate_lists(k_nearest)
+        if construction == "batched" and not tsp_graph.dense:
+            raise ValueError("Batched tour construction requires a dense TSPGraph")
+        if data_collection not in ("full", "compact"):
+            raise ValueError(f"Unknown data_collection mode: {data_collection}")
+        if local_search is not None and not tsp_graph.dense:
+            raise ValueError("Local search requires a dense TSPGraph")
+        # Agent tours after the first step do not contain their start city
+        if local_search is not None and construction != "batched":
+            raise ValueError("Local search requires batched tour construction")
+        # 2-opt and Or-opt reverse parts of tours, which changes their length if
+        # the distances differ by direction
+        if (
+            (local_search is not None or or_opt)
+            and tsp_graph.dense
+            and not np.array_equal(tsp_graph.distance, tsp_graph.distance.T)
+        ):
+            raise ValueError("Local search requires a symmetric distance matrix")
+        if pheromone_strategy is not None and not tsp_graph.dense:
+            raise ValueError("Pheromone strategies require a dense TSPGraph")
         self.num_agents = num_agents
+        self.ant_alpha = ant_alpha
+        self.ant_beta = ant_beta
+        self.construction = construction
+        self.local_search = local_search
+        self.or_opt = or_opt
+        self.pheromone_strategy = pheromone_strategy
+        if local_search is not None:
+            self._extended_distance = extend_distance(tsp_graph.distance)
         self.tsp_graph = tsp_graph
         self.num_cities = tsp_graph.num_cities
         self.all_cities = set(range(self.num_cities))
@@ -191,28 +471,53 @@ class AcoTspModel(mesa.Model):
         self.best_path = None
         self.best_distance = float("inf")
         self.best_distance_iter = float("inf")
+        self.best_tours = []
+        self.tour_history = deque(maxlen=tour_history) if tour_history else None
         # Re-initialize pheromone levels
-        tsp_graph._add_edge_properties()
-
+        if pheromone_strategy is not None:
+            pheromone_strategy.initialize(self)
+        else:
+            tsp_graph.reset_pheromone()
+
+        model_reporters = {
+            "num_steps": "num_steps",
+            "best_distance": "best_distance",
+            "best_distance_iter": "best_distance_iter",
+        }
+        agent_reporters = {"tsp_distance": "tsp_distance"}
+        if data_collection == "full":
+            model_reporters["best_path"] = "best_path"
+            agent_reporters["tsp_solution"] = "tsp_solution"
         self.datacollector = mesa.datacollection.DataCollector(
-            model_reporters={
-                "num_steps": "num_steps",
-                "best_distance": "best_distance",
-                "best_distance_iter": "best_distance_iter",
-                "best_path": "best_path",
-            },
-            agent_reporters={
-                "tsp_distance": "tsp_distance",
-                "tsp_solution": "tsp_solution",
-            },
+            model_reporters=model_reporters, agent_reporters=agent_reporters
         )
         self.datacollector.collect(self)  # Collect initial state at steps=0
 
         self.running = True
 
+    def current_tours(self):
+        """Tours of all ants as arrays of city indices, and their distances."""
+        tours = [
+            self.tsp_graph.tour_indices(ant.tsp_solution)
+            for ant in self.agents
+            if ant.tsp_solution
+        ]
+        distances = np.array(
+            [ant.tsp_distance for ant in self.agents if ant.tsp_solution]
+        )
+        return tours, distances
+
     def update_pheromone(self, q: float = 100, ro: float = 0.5):
+        if self.pheromone_strategy is not None:
+            self.pheromone_strategy.global_update(self)
+            return
+        if self.tsp_graph.dense:
+            AntSystem(q, ro).global_update(self)
+            return
+
         # tau_ij(t+1) = (1-ro)*tau_ij(t) + delta_tau_ij(t)
         # delta_tau_ij(t) = sum_k^M {Q/L^k} * I[i,j \in T^k]
+
         delta_tau_ij = {}
         for k, agent in enumerate(self.agents):
             delta_tau_ij[k] = agent.calculate_pheromone_delta(q)
@@ -226,23 +531,102 @@ class AcoTspModel(mesa.Model):
 
             self.grid.G[i][j]["pheromone"] = tau_ij
 
+    def reinforce_tour(self, tour, distance: float, q: float = 100):
+        """Lay pheromone along a tour found elsewhere, e.g. by another colony.
+
+        The deposit follows the ``pheromone_strategy``, so e.g. MAX-MIN Ant System
+        keeps its trail limits. Without one it is the Ant System's ``q / L``.
+        """
+        if distance < self.best_distance:
+            self.best_distance = distance
+            self.best_path = list(tour)
+            self.best_tours.append((self.steps, self.best_distance, self.best_path))
+
+        if self.tsp_graph.dense:
+            strategy = self.pheromone_strategy or AntSystem(q)
+            strategy.reinforce(self, self.tsp_graph.tour_indices(tour), distance)
+        else:
+            for i, j in zip(tour[:-1], tour[1:]):
+                if self.grid.G.has_edge(i, j):
+                    self.grid.G[i][j]["pheromone"] += q / distance
+
+    def construct_tours(self):
+        """Build the tours of all ants at once and hand them back to the agents."""
+        ants = list(self.agents)
+        node_index = self.tsp_graph.node_index
+        start = np.array([node_index[ant.cell.coordinate] for ant in ants])
+        strategy = self.pheromone_strategy
+        local_update = (
+            strategy.local_update
+            if strategy is not None and strategy.has_local_update
+            else None
+        )
+        tours, distances = construct_tours(
+            self.tsp_graph,
+            start,
+            self.ant_alpha,
+            self.ant_beta,
+            self.rng,
+            local_update=local_update,
+        )
+
+        nodes = self.tsp_graph.nodes
+        for ant, tour, distance in zip(ants, tours, distances):
+            ant.tsp_solution = [nodes[i] for i in tour]
+            ant.tsp_distance = float(distance)
+            ant.cell = self.grid[ant.tsp_solution[-1]]
+
+    def improve_tours(self):
+        """Run the local search on the iteration-best tour or on all tours."""
+        if self.local_search == "iteration_best":
+            ants = [min(self.agents, key=lambda ant: ant.tsp_distance)]
+        else:
+            ants = list(self.agents)
+
+        nodes = self.tsp_graph.nodes
+        for ant in ants:
+            tour, distance = improve_tour(
+                self.tsp_graph.tour_indices(ant.tsp_solution),
+                self._extended_distance,
+                or_opt=self.or_opt,
+            )
+            ant.tsp_solution = [nodes[i] for i in tour]
+            ant.tsp_distance = distance
+
     def step(self):
         """A model step. Used for activating the agents and collecting data."""
-        self.agents.shuffle_do("step")
-        self.update_pheromone()
+        if self.construction == "batched":
+            self.construct_tours()
+        else:
+            self.agents.shuffle_do("step")
+        if self.local_search is not None:
+            self.improve_tours()
 
         # Check len of cities visited by an agent
         best_instance_iter = float("inf")
+        improved = False
         for agent in self.agents:
             # Check for best path
             if agent.tsp_distance < self.best_distance:
                 self.best_distance = agent.tsp_distance
                 self.best_path = agent.tsp_solution
+                improved = True
 
             if agent.tsp_distance < best_instance_iter:
                 best_instance_iter = agent.tsp_distance
 
         self.best_distance_iter = best_instance_iter
+        if improved:
+            self.best_tours.append((self.steps, self.best_distance, self.best_path))
+        if self.tour_history is not None:
+            self.tour_history.append(
+                np.array(
+                    [self.tsp_graph.tour_indices(a.tsp_solution) for a in self.agents],
+                    dtype=np.int32,
+                )
+            )
+        # After the best tour is known, as some strategies deposit along it
+        self.update_pheromone()
 
         if self.num_steps >= self.max_steps:
             self.running = False
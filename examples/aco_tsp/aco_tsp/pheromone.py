@@ -0,0 +1,218 @@
+"""Pheromone update rules for ``AcoTspModel``.
+
+Each strategy works on the pheromone matrix of a dense ``TSPGraph`` and is called by
+the model once per iteration, after all ants have built (and possibly improved) their
+tours and the best tour has been updated. Strategies may keep state between
+iterations, so use one instance per model.
+
+References:
+    Dorigo, M., & Stützle, T. (2004). Ant Colony Optimization. MIT Press.
+"""
+
+import numpy as np
+
+
+def deposit(tsp_graph, tours, amounts) -> np.ndarray:
+    """Matrix with ``amounts[k]`` added on every edge of ``tours[k]``."""
+    delta_tau = np.zeros_like(tsp_graph.pheromone)
+    if len(tours) == 0:
+        return delta_tau
+    rows = np.concatenate([tour[:-1] for tour in tours])
+    cols = np.concatenate([tour[1:] for tour in tours])
+    weights = np.concatenate(
+        [np.full(len(tour) - 1, amount) for tour, amount in zip(tours, amounts)]
+    )
+    np.add.at(delta_tau, (rows, cols), weights)
+    if not tsp_graph.g.is_directed():
+        # An undirected edge is the same trail whichever way it was walked
+        delta_tau += delta_tau.T
+    return delta_tau
+
+
+def nearest_neighbor_length(distance: np.ndarray, start: int = 0) -> float:
+    """Length of the greedy nearest-neighbour path, used to scale initial pheromone."""
+    num_cities = len(distance)
+    visited = np.zeros(num_cities, dtype=bool)
+    current = start
+    length = 0.0
+    for _ in range(num_cities - 1):
+        visited[current] = True
+        remaining = np.where(visited, np.inf, distance[current])
+        nearest = np.argmin(remaining)
+        length += remaining[nearest]
+        current = nearest
+    return length
+
+
+class PheromoneStrategy:
+    """Base class for pheromone update rules."""
+
+    # Whether ``local_update`` has to be called every time an ant moves
+    has_local_update = False
+
+    def initialize(self, model):
+        """Set the initial pheromone levels."""
+        model.tsp_graph.reset_pheromone()
+
+    def local_update(self, tsp_graph, i, j):
+        """Update edges ``i[k] -> j[k]`` right after ants walked them."""
+
+    def global_update(self, model):
+        """Update the pheromone once all ants completed their tours."""
+        raise NotImplementedError
+
+    def reinforce(self, model, tour, distance: float):
+        """Lay pheromone along a tour of length ``distance`` found outside the model.
+
+        Called after ``model.best_distance`` has been updated with the tour.
+        """
+        raise NotImplementedError
+
+
+class AntSystem(PheromoneStrategy):
+    """Ant System: evaporate everywhere, every ant deposits ``q / L`` on its tour."""
+
+    def __init__(self, q: float = 100, ro: float = 0.5):
+        self.q = q
+        self.ro = ro
+
+    def global_update(self, model):
+        # tau_ij(t+1) = (1-ro)*tau_ij(t) + delta_tau_ij(t)
+        # delta_tau_ij(t) = sum_k^M {Q/L^k} * I[i,j \in T^k]
+        tours, distances = model.current_tours()
+        tsp_graph = model.tsp_graph
+        delta_tau = deposit(tsp_graph, tours, self.q / distances)
+        tsp_graph.pheromone *= 1 - self.ro
+        tsp_graph.pheromone += delta_tau
+
+    def reinforce(self, model, tour, distance: float):
+        model.tsp_graph.pheromone += deposit(
+            model.tsp_graph, [tour], [self.q / distance]
+        )
+
+
+class ElitistAntSystem(AntSystem):
+    """Ant System plus an extra ``elite_weight * q / L_best`` on the best-so-far tour."""
+
+    def __init__(self, q: float = 100, ro: float = 0.5, elite_weight: float = 5.0):
+        super().__init__(q, ro)
+        self.elite_weight = elite_weight
+
+    def global_update(self, model):
+        super().global_update(model)
+        best_tour = model.tsp_graph.tour_indices(model.best_path)
+        amount = self.elite_weight * self.q / model.best_distance
+        model.tsp_graph.pheromone += deposit(model.tsp_graph, [best_tour], [amount])
+
+
+class MaxMinAntSystem(PheromoneStrategy):
+    """MAX-MIN Ant System.
+
+    Only the iteration-best (or best-so-far) ant deposits ``1 / L``, and the pheromone
+    is kept within ``[tau_min, tau_max]``, with ``tau_max = 1 / (ro * L_best)``. The
+    trails start at ``tau_max`` and are reset to it once the best tour has not improved
+    for ``restart_after`` iterations.
+    """
+
+    def __init__(
+        self,
+        ro: float = 0.02,
+        p_best: float = 0.05,
+        restart_after: int = 50,
+        use_best_so_far: bool = False,
+    ):
+        self.ro = ro
+        self.p_best = p_best
+        self.restart_after = restart_after
+        self.use_best_so_far = use_best_so_far
+        self.tau_max = None
+        self._last_best_distance = float("inf")
+        self._stagnant_iterations = 0
+
+    def _reset_trails(self, tsp_graph):
+        tsp_graph.pheromone = np.where(tsp_graph.adjacency, self.tau_max, 0.0)
+
+    def _tau_bounds(self, num_cities: int, best_distance: float):
+        tau_max = 1 / (self.ro * best_distance)
+        p_dec = self.p_best ** (1 / num_cities)
+        tau_min = tau_max * (1 - p_dec) / ((num_cities / 2 - 1) * p_dec)
+        return min(tau_min, tau_max), tau_max
+
+    def initialize(self, model):
+        tsp_graph = model.tsp_graph
+        self.tau_max = 1 / (self.ro * nearest_neighbor_length(tsp_graph.distance))
+        self._reset_trails(tsp_graph)
+
+    def _clamp(self, tsp_graph, best_distance: float):
+        tau_min, self.tau_max = self._tau_bounds(tsp_graph.num_cities, best_distance)
+        np.clip(tsp_graph.pheromone, tau_min, self.tau_max, out=tsp_graph.pheromone)
+        tsp_graph.pheromone[~tsp_graph.adjacency] = 0.0
+
+    def global_update(self, model):
+        tsp_graph = model.tsp_graph
+        if self.use_best_so_far:
+            tour = tsp_graph.tour_indices(model.best_path)
+            distance = model.best_distance
+        else:
+            tours, distances = model.current_tours()
+            best = np.argmin(distances)
+            tour, distance = tours[best], distances[best]
+
+        tsp_graph.pheromone *= 1 - self.ro
+        tsp_graph.pheromone += deposit(tsp_graph, [tour], [1 / distance])
+        self._clamp(tsp_graph, model.best_distance)
+
+        if model.best_distance < self._last_best_distance:
+            self._last_best_distance = model.best_distance
+            self._stagnant_iterations = 0
+        else:
+            self._stagnant_iterations += 1
+            if self._stagnant_iterations >= self.restart_after:
+                self._reset_trails(tsp_graph)
+                self._stagnant_iterations = 0
+
+    def reinforce(self, model, tour, distance: float):
+        tsp_graph = model.tsp_graph
+        tsp_graph.pheromone += deposit(tsp_graph, [tour], [1 / distance])
+        self._clamp(tsp_graph, model.best_distance)
+
+
+class AntColonySystem(PheromoneStrategy):
+    """Ant Colony System updates.
+
+    Local: every edge an ant walks moves towards the initial level,
+    ``tau = (1 - xi) * tau + xi * tau_0``, which pushes the following ants to explore.
+    Global: only the edges of the best-so-far tour evaporate and receive ``ro / L_best``.
+    ``tau_0 = 1 / (num_cities * L_nn)``, with ``L_nn`` the nearest-neighbour tour length.
+    """
+
+    has_local_update = True
+
+    def __init__(self, ro: float = 0.1, xi: float = 0.1):
+        self.ro = ro
+        self.xi = xi
+        self.tau_0 = None
+
+    def initialize(self, model):
+        tsp_graph = model.tsp_graph
+        length = nearest_neighbor_length(tsp_graph.distance)
+        self.tau_0 = 1 / (tsp_graph.num_cities * length)
+        tsp_graph.pheromone = np.where(tsp_graph.adjacency, self.tau_0, 0.0)
+
+    def local_update(self, tsp_graph, i, j):
+        pheromone = tsp_graph.pheromone
+        pheromone[i, j] = (1 - self.xi) * pheromone[i, j] + self.xi * self.tau_0
+        if not tsp_graph.g.is_directed():
+            pheromone[j, i] = pheromone[i, j]
+
+    def _update_tour(self, tsp_graph, tour, distance: float):
+        on_tour = deposit(tsp_graph, [tour], [1.0]) > 0
+        pheromone = tsp_graph.pheromone
+        pheromone[on_tour] = (1 - self.ro) * pheromone[on_tour] + self.ro / distance
+
+    def global_update(self, model):
+        best_tour = model.tsp_graph.tour_indices(model.best_path)
+        self._update_tour(model.tsp_graph, best_tour, model.best_distance)
+
+    def reinforce(self, model, tour, distance: float):
+        self._update_tour(model.tsp_graph, tour, distance)
@@ -0,0 +1,267 @@
+"""Reader for TSPLIB instances.
+
+See http://comopt.ifi.uni-heidelberg.de/software/TSPLIB95/tsp95.pdf for the format.
+Supported are coordinate instances with the EUC_2D, CEIL_2D, GEO and ATT metrics, and
+EXPLICIT instances in any of the EDGE_WEIGHT_FORMATs of the specification.
+
+Only EXPLICIT instances keep a distance matrix. The distances of coordinate instances
+are computed from the coordinates when they are needed, for single edges with
+``TSPInstance.distances`` or for all pairs, block by block, with
+``TSPInstance.distance_matrix``.
+"""
+
+import contextlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+# Number of distances computed at once by ``TSPInstance.distance_matrix``
+BLOCK_SIZE = 2**20
+
+
+def _nint(x: np.ndarray) -> np.ndarray:
+    # TSPLIB's nint: round half up, as (int)(x + 0.5)
+    return np.floor(x + 0.5)
+
+
+# The metrics take the coordinates of the two ends of every edge, as arrays of shape
+# (..., 2) that are broadcast against each other
+
+
+def _euclidean(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.hypot(a[..., 0] - b[..., 0], a[..., 1] - b[..., 1])
+
+
+def _geo(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    def radians(coords):
+        pi = 3.141592
+        degrees = np.trunc(coords)
+        return pi * (degrees + 5.0 * (coords - degrees) / 3.0) / 180.0
+
+    a, b = radians(a), radians(b)
+    q1 = np.cos(a[..., 1] - b[..., 1])
+    q2 = np.cos(a[..., 0] - b[..., 0])
+    q3 = np.cos(a[..., 0] + b[..., 0])
+    cosine = np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0)
+    return np.trunc(6378.388 * np.arccos(cosine) + 1.0)
+
+
+def _att(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    r = _euclidean(a, b) / np.sqrt(10.0)
+    t = _nint(r)
+    return np.where(t < r, t + 1, t)
+
+
+METRICS = {
+    "EUC_2D": lambda a, b: _nint(_euclidean(a, b)),
+    "CEIL_2D": lambda a, b: np.ceil(_euclidean(a, b)),
+    "GEO": _geo,
+    "ATT": _att,
+}
+# Rounded or scaled Euclidean distances, which rank cities like Euclidean distances
+EUCLIDEAN_METRICS = {"EUC_2D", "CEIL_2D", "ATT"}
+
+
+@dataclass
+class TSPInstance:
+    name: str
+    edge_weight_type: str
+    node_ids: np.ndarray
+    # Node coordinates, or display coordinates for EXPLICIT instances (may be empty)
+    coords: np.ndarray
+    # Distance matrix of EXPLICIT instances, None for coordinate instances
+    explicit_distance: np.ndarray | None = None
+
+    @property
+    def dimension(self):
+        return len(self.node_ids)
+
+    @property
+    def symmetric(self) -> bool:
+        if self.explicit_distance is None:
+            return True
+        return np.array_equal(self.explicit_distance, self.explicit_distance.T)
+
+    def distances(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """Distances from the cities at indices ``i`` to those at ``j``, broadcast."""
+        if self.explicit_distance is not None:
+            return self.explicit_distance[i, j]
+        return METRICS[self.edge_weight_type](self.coords[i], self.coords[j])
+
+    def distance_matrix(self) -> np.ndarray:
+        """The distances between all cities, computed in blocks of rows if needed."""
+        if self.explicit_distance is not None:
+            return self.explicit_distance
+        dimension = self.dimension
+        distance = np.empty((dimension, dimension))
+        columns = np.arange(dimension)
+        rows = max(1, BLOCK_SIZE // max(dimension, 1))
+        for start in range(0, dimension, rows):
+            block = columns[start : start + rows, np.newaxis]
+            distance[start : start + rows] = self.distances(block, columns)
+        return distance
+
+    def nearest_neighbors(self, k: int) -> np.ndarray:
+        """Indices of the ``k`` nearest other cities of each city, closest first.
+
+        Distances are computed in blocks of rows, so the full matrix of a coordinate
+        instance is never held in memory.
+        """
+        dimension = self.dimension
+        k = min(k, dimension - 1)
+        neighbors = np.empty((dimension, k), dtype=np.intp)
+        columns = np.arange(dimension)
+        rows = max(1, BLOCK_SIZE // max(dimension, 1))
+        for start in range(0, dimension, rows):
+            block = columns[start : start + rows]
+            distance = self.distances(block[:, np.newaxis], columns).astype(float)
+            distance[np.arange(len(block)), block] = np.inf
+            nearest = np.argpartition(distance, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(distance, nearest, 1), axis=1)
+            neighbors[start : start + rows] = np.take_along_axis(nearest, order, 1)
+        return neighbors
+
+
+# Formats listing the upper triangle column by column are the lower triangle listed
+# row by row (and vice versa), since the matrix is symmetric.
+TRIANGULAR_FORMATS = {
+    "UPPER_ROW": (np.triu_indices, 1),
+    "LOWER_COL": (np.triu_indices, 1),
+    "LOWER_ROW": (np.tril_indices, -1),
+    "UPPER_COL": (np.tril_indices, -1),
+    "UPPER_DIAG_ROW": (np.triu_indices, 0),
+    "LOWER_DIAG_COL": (np.triu_indices, 0),
+    "LOWER_DIAG_ROW": (np.tril_indices, 0),
+    "UPPER_DIAG_COL": (np.tril_indices, 0),
+}
+
+
+def _read_numbers(lines, count: int) -> np.ndarray:
+    """Read ``count`` whitespace separated numbers, however they are spread over lines."""
+    tokens = []
+    while len(tokens) < count:
+        line = next(lines, None)
+        if line is None:
+            raise ValueError(
+                f"Expected {count} numbers, file ended after {len(tokens)}"
+            )
+        tokens.extend(line.split())
+    return np.array(tokens[:count], dtype=float)
+
+
+def _explicit_matrix(values: np.ndarray, dimension: int, edge_weight_format: str):
+    if edge_weight_format == "FULL_MATRIX":
+        return values.reshape(dimension, dimension)
+    if edge_weight_format not in TRIANGULAR_FORMATS:
+        raise ValueError(f"Unsupported EDGE_WEIGHT_FORMAT: {edge_weight_format}")
+    indices, offset = TRIANGULAR_FORMATS[edge_weight_format]
+    distance = np.zeros((dimension, dimension))
+    distance[indices(dimension, k=offset)] = values
+    return np.maximum(distance, distance.T)
+
+
+def _explicit_size(dimension: int, edge_weight_format: str) -> int:
+    if edge_weight_format == "FULL_MATRIX":
+        return dimension * dimension
+    if edge_weight_format not in TRIANGULAR_FORMATS:
+        raise ValueError(f"Unsupported EDGE_WEIGHT_FORMAT: {edge_weight_format}")
+    _, offset = TRIANGULAR_FORMATS[edge_weight_format]
+    return dimension * (dimension + 1) // 2 - (dimension if offset else 0)
+
+
+def parse_tsplib(file_path) -> TSPInstance:
+    """Parse a TSPLIB file in a single pass over its lines."""
+    header = {}
+    coords = np.empty((0, 2))
+    node_ids = None
+    values = None
+
+    with open(file_path) as f:
+        lines = (line.strip() for line in f)
+        lines = (line for line in lines if line)
+        for line in lines:
+            keyword = line.rstrip(":").strip()
+            if keyword == "EOF":
+                break
+            if keyword in ("NODE_COORD_SECTION", "DISPLAY_DATA_SECTION"):
+                dimension = int(header["DIMENSION"])
+                rows = _read_numbers(lines, 3 * dimension).reshape(dimension, 3)
+                node_ids = rows[:, 0].astype(int)
+                coords = rows[:, 1:]
+            elif keyword == "EDGE_WEIGHT_SECTION":
+                dimension = int(header["DIMENSION"])
+                size = _explicit_size(dimension, header["EDGE_WEIGHT_FORMAT"])
+                values = _read_numbers(lines, size)
+            elif ":" in line:
+                key, value = line.split(":", 1)
+                header[key.strip()] = value.strip()
+            else:
+                # Sections we don't need, e.g. FIXED_EDGES_SECTION, end with -1
+                for skipped in lines:
+                    if skipped == "-1":
+                        break
+
+    dimension = int(header["DIMENSION"])
+    edge_weight_type = header.get("EDGE_WEIGHT_TYPE", "EUC_2D")
+    explicit_distance = None
+    if edge_weight_type == "EXPLICIT":
+        explicit_distance = _explicit_matrix(
+            values, dimension, header["EDGE_WEIGHT_FORMAT"]
+        )
+    elif edge_weight_type not in METRICS:
+        raise ValueError(f"Unsupported EDGE_WEIGHT_TYPE: {edge_weight_type}")
+    if node_ids is None:
+        node_ids = np.arange(1, dimension + 1)
+
+    return TSPInstance(
+        name=header.get("NAME", Path(file_path).stem),
+        edge_weight_type=edge_weight_type,
+        node_ids=node_ids,
+        coords=coords,
+        explicit_distance=explicit_distance,
+    )
+
+
+def load_tsplib(file_path, cache: bool = True) -> TSPInstance:
+    """Load a TSPLIB instance, reusing a ``.npz`` cache stored next to the file.
+
+    The cache holds the node ids and coordinates, and only for EXPLICIT instances
+    the distance matrix. It is rebuilt whenever the source file is newer than it. If
+    the cache cannot be written, e.g. on a read-only file system, the instance is
+    still returned.
+    """
+    file_path = Path(file_path)
+    cache_path = file_path.with_suffix(".npz")
+    is_fresh = (
+        cache_path.exists() and cache_path.stat().st_mtime >= file_path.stat().st_mtime
+    )
+    if cache and is_fresh:
+        with np.load(cache_path) as data:
+            edge_weight_type = str(data["edge_weight_type"])
+            return TSPInstance(
+                name=str(data["name"]),
+                edge_weight_type=edge_weight_type,
+                node_ids=data["node_ids"],
+                coords=data["coords"],
+                # Caches of older versions also hold the matrix of other instances
+                explicit_distance=(
+                    data["distance"] if edge_weight_type == "EXPLICIT" else None
+                ),
+            )
+
+    instance = parse_tsplib(file_path)
+    if cache:
+        arrays = {}
+        if instance.explicit_distance is not None:
+            arrays["distance"] = instance.explicit_distance
+        with contextlib.suppress(OSError):
+            np.savez(
+                cache_path,
+                name=instance.name,
+                edge_weight_type=instance.edge_weight_type,
+                node_ids=instance.node_ids,
+                coords=instance.coords,
+                **arrays,
+            )
+    return instance
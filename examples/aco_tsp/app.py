@@ -40,7 +40,7 @@ def make_graph(model):
     fig = Figure()
     ax = fig.subplots()
     ax.set_title("Cities and pheromone trails")
-    graph = model.grid.G
+    graph = model.tsp_graph.graph_view()
     pos = model.tsp_graph.pos
     weights = [graph[u][v]["pheromone"] for u, v in graph.edges()]
     # normalize the weights
@@ -0,0 +1,72 @@
+"""Compare the pheromone update strategies by time to reach a target tour length.
+
+Every strategy runs from the same seeds on kroA100 (optimal closed tour: 21282) until
+its best tour is at most ``--target`` long or ``--max-iterations`` is reached.
+"""
+
+import argparse
+import time
+
+import numpy as np
+from aco_tsp.model import AcoTspModel, TSPGraph
+from aco_tsp.pheromone import (
+    AntColonySystem,
+    AntSystem,
+    ElitistAntSystem,
+    MaxMinAntSystem,
+)
+
+STRATEGIES = {
+    "AS": AntSystem,
+    "EAS": ElitistAntSystem,
+    "MMAS": MaxMinAntSystem,
+    "ACS": AntColonySystem,
+}
+
+
+def time_to_target(tsp_graph, strategy, target, max_iterations, seed):
+    """Return iterations, seconds and best distance of one run."""
+    model = AcoTspModel(
+        num_agents=25,
+        tsp_graph=tsp_graph,
+        construction="batched",
+        k_nearest=20,
+        data_collection="compact",
+        pheromone_strategy=strategy,
+        seed=seed,
+    )
+    start = time.perf_counter()
+    while model.steps < max_iterations and model.best_distance > target:
+        model.step()
+    return model.steps, time.perf_counter() - start, model.best_distance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--target", type=float, default=21800)
+    parser.add_argument("--max-iterations", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    tsp_graph = TSPGraph.from_tsp_file("aco_tsp/data/kroA100.tsp", dense=True)
+    print(f"Target tour length: {args.target:.0f}")
+    print(
+        f"{'Strategy':<8}{'Reached':>10}{'Iterations':>12}{'Seconds':>10}{'Best':>10}"
+    )
+    for name, strategy_class in STRATEGIES.items():
+        runs = [
+            time_to_target(
+                tsp_graph, strategy_class(), args.target, args.max_iterations, seed
+            )
+            for seed in range(args.runs)
+        ]
+        iterations, seconds, best = np.array(runs).T
+        reached = int((best <= args.target).sum())
+        print(
+            f"{name:<8}{f'{reached}/{args.runs}':>10}{iterations.mean():>12.1f}"
+            f"{seconds.mean():>10.2f}{best.min():>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
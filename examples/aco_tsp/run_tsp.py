@@ -1,15 +1,25 @@
+import argparse
 from collections import defaultdict
 
 import matplotlib.pyplot as plt
+from aco_tsp.colonies import run_colonies
 from aco_tsp.model import AcoTspModel, TSPGraph
 
 
 def main():
     # tsp_graph = TSPGraph.from_random(num_cities=20, seed=1)
-    tsp_graph = TSPGraph.from_tsp_file("aco_tsp/data/kroA100.tsp")
+    tsp_graph = TSPGraph.from_tsp_file("aco_tsp/data/kroA100.tsp", dense=True)
     model_params = {
         "num_agents": tsp_graph.num_cities,
         "tsp_graph": tsp_graph,
+        "construction": "batched",
+        # Candidate list size; set to None to keep the complete graph
+        "k_nearest": 20,
+        # Improve the best tour of every iteration with 2-opt; None for pure ACO
+        "local_search": "iteration_best",
+        # Only record distances; tours are kept in model.best_tours
+        "data_collection": "compact",
+        "seed": 42,
     }
     number_of_episodes = 50
 
@@ -19,6 +29,11 @@ def main():
     best_distance = float("inf")
 
     model = AcoTspModel(**model_params)
+    print(
+        f"Graph keeps {model.tsp_graph.num_edges} networkx edges; candidate lists "
+        f"skipped {model.tsp_graph.edges_skipped():.1%} of the edges of the complete "
+        f"graph. Dense matrices use {model.tsp_graph.matrix_nbytes / 1e6:.1f} MB"
+    )
 
     for e in range(number_of_episodes):
         # model = AcoTspModel(**model_params)
@@ -26,7 +41,7 @@ def main():
         results["best_distance"].append(model.best_distance)
         results["best_path"].append(model.best_path)
         print(
-            f"Episode={e + 1}; Min. distance={model.best_distance:.2f}; pheromone_1_8={model.grid.G[17][15]['pheromone']:.4f}"
+            f"Episode={e + 1}; Min. distance={model.best_distance:.2f}; pheromone_1_8={model.tsp_graph.get_pheromone(17, 15):.4f}"
         )
         if model.best_distance < best_distance:
             best_distance = model.best_distance
@@ -43,5 +58,47 @@ def main():
     plt.show()
 
 
+def main_multi_colony(num_colonies=None):
+    """Run one colony per CPU core (or ``num_colonies``) that share their best tours."""
+    tsp_graph = TSPGraph.from_tsp_file("aco_tsp/data/kroA100.tsp", dense=True)
+    result = run_colonies(
+        tsp_graph,
+        num_colonies=num_colonies,
+        num_iterations=50,
+        migration_interval=5,
+        migration="best_tour",
+        num_agents=tsp_graph.num_cities,
+        construction="batched",
+        k_nearest=20,
+    )
+
+    for colony, trace in result.traces.items():
+        params = result.colony_params[colony]
+        print(
+            f"Colony={colony}; alpha={params['ant_alpha']:.2f}; "
+            f"beta={params['ant_beta']:.2f}; Min. distance={trace[-1]:.2f}"
+        )
+    print(f"Best distance: {result.best_distance:.2f}")
+    print(f"Best path: {result.best_path}")
+
+    _, ax = plt.subplots()
+    for colony, trace in result.traces.items():
+        ax.plot(trace, label=f"Colony {colony}")
+    ax.set(xlabel="Episode", ylabel="Best distance", title="Best distance per colony")
+    ax.legend()
+    plt.show()
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--colonies",
+        type=int,
+        default=1,
+        help="Number of colonies to run in parallel; 0 uses one per CPU core",
+    )
+    args = parser.parse_args()
+    if args.colonies == 1:
+        main()
+    else:
+        main_multi_colony(args.colonies or None)
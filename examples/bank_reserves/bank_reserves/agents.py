@@ -62,18 +62,25 @@ class Person(CellAgent):
         # person's bank, set at __init__, all people have the same bank in this model
         self.bank = bank
 
+    @property
+    def cell(self):
+        return self._mesa_cell
+
+    @cell.setter
+    def cell(self, cell):
+        # keep the model's occupancy index in sync with every move
+        self.model.occupancy.move(self, CellAgent.cell.fget(self), cell)
+        CellAgent.cell.fset(self, cell)
+
     def do_business(self):
         """Check if person has any savings, any money in wallet, or if the
         bank can loan them any money
         """
-        if (self.savings > 0 or self.wallet > 0 or self.bank.bank_to_loan > 0) and len(
-            self.cell.agents
-        ) > 1:
-            # create list of people at my location (includes self)
-            # set customer to self for while loop condition
-            customer = self
-            while customer == self:
-                customer = self.random.choice(self.cell.agents)
+        if (
+            self.savings > 0 or self.wallet > 0 or self.bank.bank_to_loan > 0
+        ) and self.model.occupancy.count(self.cell) > 1:
+            # pick a random other person at my location from the occupancy index
+            customer = self.model.occupancy.draw_other(self, self.cell, self.random)
             # 50% chance of trading with customer
             if self.random.randint(0, 1) == 0:
                 # 50% chance of trading $5
@@ -9,11 +9,15 @@ Author of NetLogo code:
     Northwestern University, Evanston, IL.
 """
 
+import itertools
+
 import mesa
 import numpy as np
 from mesa.experimental.cell_space import OrthogonalMooreGrid
 
 from .agents import Bank, Person
+from .occupancy import OccupancyIndex
+from .vectorized import VectorizedPeople
 
 """
 If you want to perform a parameter sweep, call batch_run.py instead of run.py.
@@ -23,54 +27,89 @@ For details see batch_run.py in the same directory as run.py.
 # Start of datacollector functions
 
 
+def get_people_state(model):
+    """Savings, loans and wallets of all people as arrays, in one pass."""
+    if model.engine == "vectorized":
+        return model.people.savings, model.people.loans, model.people.wallet
+    if len(model.agents) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    columns = zip(*[(a.savings, a.loans, a.wallet) for a in model.agents])
+    # Each column keeps the type of the attributes, ints unless a loan was partial
+    return tuple(np.array(column) for column in columns)
+
+
+def get_aggregates(model):
+    """Class counts and money totals of all people, computed in a single pass.
+
+    The result is cached for the current step, so the reporters below all share
+    one traversal of the agents per collection.
+    """
+    if model._aggregates is not None and model._aggregates[0] == model.steps:
+        return model._aggregates[1]
+
+    savings, loans, wallets = get_people_state(model)
+    total_savings = savings.sum()
+    total_wallets = wallets.sum()
+    aggregates = {
+        "Rich": int(np.count_nonzero(savings > model.rich_threshold)),
+        "Poor": int(np.count_nonzero(loans > 10)),
+        "Middle Class": int(
+            np.count_nonzero((loans < 10) & (savings < model.rich_threshold))
+        ),
+        "Savings": total_savings,
+        "Wallets": total_wallets,
+        "Money": total_wallets + total_savings,
+        "Loans": loans.sum(),
+    }
+    model._aggregates = (model.steps, aggregates)
+    return aggregates
+
+
 def get_num_rich_agents(model):
     """Return number of rich agents"""
-    rich_agents = [a for a in model.agents if a.savings > model.rich_threshold]
-    return len(rich_agents)
+    return get_aggregates(model)["Rich"]
 
 
 def get_num_poor_agents(model):
     """Return number of poor agents"""
-    poor_agents = [a for a in model.agents if a.loans > 10]
-    return len(poor_agents)
+    return get_aggregates(model)["Poor"]
 
 
 def get_num_mid_agents(model):
     """Return number of middle class agents"""
-    mid_agents = [
-        a for a in model.agents if a.loans < 10 and a.savings < model.rich_threshold
-    ]
-    return len(mid_agents)
+    return get_aggregates(model)["Middle Class"]
 
 
 def get_total_savings(model):
     """Sum of all agents' savings"""
-    agent_savings = [a.savings for a in model.agents]
-    # return the sum of agents' savings
-    return np.sum(agent_savings)
+    return get_aggregates(model)["Savings"]
 
 
 def get_total_wallets(model):
     """Sum of amounts of all agents' wallets"""
-    agent_wallets = [a.wallet for a in model.agents]
-    # return the sum of all agents' wallets
-    return np.sum(agent_wallets)
+    return get_aggregates(model)["Wallets"]
 
 
 def get_total_money(model):
-    # sum of all agents' wallets
-    wallet_money = get_total_wallets(model)
-    # sum of all agents' savings
-    savings_money = get_total_savings(model)
-    # return sum of agents' wallets and savings for total money
-    return wallet_money + savings_money
+    """Sum of all agents' wallets and savings"""
+    return get_aggregates(model)["Money"]
 
 
 def get_total_loans(model):
-    # list of amounts of all agents' loans
-    agent_loans = [a.loans for a in model.agents]
-    # return sum of all agents' loans
-    return np.sum(agent_loans)
+    """Sum of all agents' loans"""
+    return get_aggregates(model)["Loans"]
+
+
+# see datacollector functions above
+model_reporters = {
+    "Rich": get_num_rich_agents,
+    "Poor": get_num_poor_agents,
+    "Middle Class": get_num_mid_agents,
+    "Savings": get_total_savings,
+    "Wallets": get_total_wallets,
+    "Money": get_total_money,
+    "Loans": get_total_loans,
+}
 
 
 class BankReservesModel(mesa.Model):
@@ -88,6 +127,15 @@ class BankReservesModel(mesa.Model):
     reserves and the bank's ability to loan at any given time is a function of
     the amount of deposits, its reserves, and its current total outstanding loan
     amount.
+
+    With engine="vectorized" there are no Person agents; the people are kept as
+    NumPy arrays in ``self.people`` instead (see vectorized.py), which makes runs
+    with up to millions of people feasible. There is no grid then, ``self.grid`` is
+    None and the positions are ``self.people.x`` and ``self.people.y``.
+
+    With a ``wealth_file``, the wealth of every person is streamed to that Parquet
+    file each step instead of being kept by the DataCollector (see
+    wealth_stream.py). Call ``close_wealth_file`` before reading it.
     """
 
     # grid height
@@ -105,52 +153,94 @@ class BankReservesModel(mesa.Model):
         init_people=2,
         rich_threshold=10,
         reserve_percent=50,
+        engine="agents",
+        wealth_file=None,
+        seed=None,
     ):
-        super().__init__()
+        super().__init__(seed=seed)
+        if engine not in ("agents", "vectorized"):
+            raise ValueError(f"Unknown engine: {engine}")
+        self.engine = engine
         self.height = height
         self.width = width
         self.init_people = init_people
 
-        self.grid = OrthogonalMooreGrid(
-            (self.width, self.height), torus=True, random=self.random
-        )
         # rich_threshold is the amount of savings a person needs to be considered "rich"
         self.rich_threshold = rich_threshold
+        # (step, values) of the last get_aggregates call
+        self._aggregates = None
         self.reserve_percent = reserve_percent
-        # see datacollector functions above
-        self.datacollector = mesa.DataCollector(
-            model_reporters={
-                "Rich": get_num_rich_agents,
-                "Poor": get_num_poor_agents,
-                "Middle Class": get_num_mid_agents,
-                "Savings": get_total_savings,
-                "Wallets": get_total_wallets,
-                "Money": get_total_money,
-                "Loans": get_total_loans,
-            },
-            agent_reporters={"Wealth": lambda x: getattr(x, "wealth", None)},
-        )
+        if engine == "agents":
+            self.grid = OrthogonalMooreGrid(
+                (self.width, self.height), torus=True, random=self.random
+            )
+            # people per cell, used to find trading partners
+            self.occupancy = OccupancyIndex()
+        else:
+            # The vectorized engine keeps the positions in arrays, building a grid
+            # of millions of cells would only cost time and memory
+            self.grid = self.occupancy = None
 
         # create a single bank for the model
         self.bank = Bank(self, self.reserve_percent)
 
-        # create people for the model according to number of people set by user
-        for _ in range(self.init_people):
-            # set x, y coords randomly within the grid
-            x = self.random.randrange(self.width)
-            y = self.random.randrange(self.height)
-            p = Person(self, True, self.bank, self.rich_threshold)
-            # place the Person object on the grid at coordinates (x, y)
-            p.move_to(self.grid[(x, y)])
+        agent_reporters = {}
+        self.wealth_stream = None
+        if wealth_file is not None:
+            # pyarrow is only needed when streaming
+            from .wealth_stream import WealthStream  # noqa: PLC0415
+
+            self.wealth_stream = WealthStream(wealth_file)
+        elif engine == "agents":
+            agent_reporters = {"Wealth": lambda x: getattr(x, "wealth", None)}
+        self.datacollector = mesa.DataCollector(
+            model_reporters=model_reporters, agent_reporters=agent_reporters
+        )
+
+        if engine == "vectorized":
+            self.people = VectorizedPeople(self, init_people, rich_threshold)
+        else:
+            # create people for the model according to number of people set by user
+            for _ in range(self.init_people):
+                # set x, y coords randomly within the grid
+                x = self.random.randrange(self.width)
+                y = self.random.randrange(self.height)
+                p = Person(self, True, self.bank, self.rich_threshold)
+                # place the Person object on the grid at coordinates (x, y)
+                p.move_to(self.grid[(x, y)])
 
         self.running = True
+        self.collect()
+
+    def get_wealth(self):
+        """Ids and wealth of all people as two arrays."""
+        if self.engine == "vectorized":
+            return np.arange(len(self.people)), self.people.wealth
+        state = np.fromiter(
+            itertools.chain.from_iterable((a.unique_id, a.wealth) for a in self.agents),
+            dtype=float,
+            count=2 * len(self.agents),
+        ).reshape(-1, 2)
+        return state[:, 0].astype(np.int64), state[:, 1]
+
+    def collect(self):
         self.datacollector.collect(self)
+        if self.wealth_stream is not None:
+            self.wealth_stream.write(self.steps, *self.get_wealth())
+
+    def close_wealth_file(self):
+        """Finish the wealth file, so it can be read with ``read_wealth``."""
+        if self.wealth_stream is not None:
+            self.wealth_stream.close()
 
     def step(self):
-        # tell all the agents in the model to run their step function
-        self.agents.shuffle_do("step")
+        if self.engine == "vectorized":
+            self.people.step()
+        else:
+            # tell all the agents in the model to run their step function
+            self.agents.shuffle_do("step")
         # collect data
-        self.datacollector.collect(self)
+        self.collect()
 
     def run_model(self):
         for _ in range(self.run_time):
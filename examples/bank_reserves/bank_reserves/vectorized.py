@@ -0,0 +1,147 @@
+"""Array-based engine for the Bank Reserves model.
+
+Instead of one ``Person`` object per person, ``VectorizedPeople`` keeps wallets,
+savings, loans, wealth and positions as NumPy arrays indexed by person, so a step is
+a handful of whole-array operations. It follows the rules of ``Person.step`` in three
+phases:
+
+1. Movement: every person moves to a random cell of its Moore neighborhood (on a
+   torus), all at once.
+2. Trade: people are bucketed by cell. Everyone who could trade in ``do_business``
+   (savings, money in the wallet, or the bank able to lend at the start of the step)
+   and shares its cell draws a random other person from its bucket, and with the
+   same probabilities as ``do_business`` gives them $5 or $2. Transfers are summed,
+   so the order of trades does not matter.
+3. Settlement: people balance their books as in ``Person.balance_books``, one after
+   the other, in the order of a random permutation drawn from the model's ``rng``
+   each step. The order matters only for the bank's reserve constraint: a person
+   who needs a loan gets at most what the bank can lend after everyone before them
+   settled. All other updates are done for everyone at once, and only the loans are
+   computed in a loop over the borrowers.
+
+With the same seed a run is therefore fully reproducible, but it does not follow
+the agent-based engine's random draws one-to-one.
+"""
+
+import numpy as np
+
+# Moore neighborhood offsets
+MOORE_OFFSETS = np.array(
+    [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+)
+
+
+class VectorizedPeople:
+    """State of all people of a ``BankReservesModel`` as NumPy arrays."""
+
+    def __init__(self, model, num_people, rich_threshold):
+        self.model = model
+        self.bank = model.bank
+        self.width = model.width
+        self.height = model.height
+        rng = model.rng
+
+        self.x = rng.integers(0, self.width, num_people)
+        self.y = rng.integers(0, self.height, num_people)
+        # start everyone off with 1 up to rich_threshold + 1 in their wallet
+        self.wallet = rng.integers(1, rich_threshold + 2, num_people).astype(float)
+        self.savings = np.zeros(num_people)
+        self.loans = np.zeros(num_people)
+        self.wealth = np.zeros(num_people)
+
+    def __len__(self):
+        return len(self.wallet)
+
+    @property
+    def cell_index(self):
+        """Flat index of each person's cell."""
+        return self.x * self.height + self.y
+
+    def move(self):
+        offsets = MOORE_OFFSETS[self.model.rng.integers(0, 8, len(self))]
+        self.x = (self.x + offsets[:, 0]) % self.width
+        self.y = (self.y + offsets[:, 1]) % self.height
+
+    def draw_customers(self):
+        """A random other person on the same cell for everyone, or -1 if alone."""
+        rng = self.model.rng
+        cells = self.cell_index
+        order = np.argsort(cells, kind="stable")
+        counts = np.bincount(cells, minlength=self.width * self.height)
+        starts = np.cumsum(counts) - counts
+        # Position of every person in the cell-sorted order
+        rank = np.empty(len(self), dtype=np.intp)
+        rank[order] = np.arange(len(self))
+
+        others = counts[cells] - 1
+        # Draw among the other people on the cell, skipping over oneself
+        draw = starts[cells] + (rng.random(len(self)) * others).astype(np.intp)
+        draw += draw >= rank
+        return np.where(others > 0, order[np.minimum(draw, len(self) - 1)], -1)
+
+    def do_business(self):
+        rng = self.model.rng
+        customers = self.draw_customers()
+        can_trade = (
+            (self.savings > 0) | (self.wallet > 0) | (self.bank.bank_to_loan > 0)
+        ) & (customers >= 0)
+        # 50% chance of trading, then 50% chance of trading $5 or $2
+        trades = can_trade & (rng.random(len(self)) < 0.5)
+        amounts = np.where(rng.random(len(self)) < 0.5, 5.0, 2.0)
+        self.wallet -= np.where(trades, amounts, 0.0)
+        self.wallet += np.bincount(
+            customers[trades], weights=amounts[trades], minlength=len(self)
+        )
+
+    def balance_books(self):
+        """Settle all wallets with the bank, see the module docstring for the order."""
+        bank = self.bank
+        keep = 1 - bank.reserve_percent / 100
+        wallet, savings, loans = self.wallet, self.savings, self.loans
+
+        # A positive wallet is deposited, a negative one is covered from savings
+        # as far as possible
+        covered = np.maximum(wallet, -savings)
+        deposits_change = covered.copy()
+        savings = savings + covered
+        wallet = wallet - covered
+
+        # People who still have a negative wallet borrow the rest from the bank.
+        # They have no savings left, so they do not repay anything this step.
+        borrowers = wallet < 0
+        # Everybody else repays as much of their loans as their savings allow
+        repay = np.where(
+            ~borrowers & (loans > 0) & (savings > 0), np.minimum(savings, loans), 0.0
+        )
+        savings -= repay
+        loans = loans - repay
+        deposits_change -= repay
+
+        # What the bank can lend to each person is what it could lend before the
+        # step, plus the effect of everybody before them in the settlement order
+        order = self.model.rng.permutation(len(self))
+        change = keep * deposits_change[order] + repay[order]
+        can_lend = bank.bank_to_loan + np.cumsum(change) - change
+        loan = np.zeros(len(self))
+        lent = 0.0
+        for position in np.flatnonzero(borrowers[order]):
+            person = order[position]
+            need = -wallet[person]
+            available = can_lend[position] - lent
+            # the bank lends what is needed, or what it can if that is less
+            loan[person] = need if available >= need else available
+            lent += loan[person]
+
+        self.wallet = wallet + loan
+        self.savings = savings
+        self.loans = loans + loan
+        self.wealth = self.savings - self.loans
+
+        bank.deposits += deposits_change.sum()
+        bank.bank_loans += loan.sum() - repay.sum()
+        bank.bank_balance()
+
+    def step(self):
+        self.move()
+        self.do_business()
+        self.balance_books()
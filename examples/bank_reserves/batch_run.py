@@ -8,27 +8,153 @@ Author of NetLogo code:
     Center for Connected Learning and Computer-Based Modeling,
     Northwestern University, Evanston, IL.
 
-This version of the model has a BatchRunner at the bottom. This
-is for collecting data on parameter sweeps. It is not meant to
-be run with run.py, since run.py starts up a server for visualization, which
-isn't necessary for the BatchRunner. To run a parameter sweep, call
-batch_run.py in the command line.
-
-The BatchRunner is set up to collect step by step data of the model. It does
-this by collecting the DataCollector object in a model_reporter (i.e. the
-DataCollector is collecting itself every step).
-
-The end result of the batch run will be a CSV file created in the same
-directory from which Python was run. The CSV file will contain the data from
-every step of every run.
+This file runs parameter sweeps of the model. It is not meant to be run with
+app.py, since app.py starts up a server for visualization, which isn't
+necessary for a batch run. To run a parameter sweep, call batch_run.py in the
+command line.
+
+Every combination of parameters in ``br_params`` is run ``iterations`` times in a
+pool of worker processes. Each finished run writes the model data its
+DataCollector collected at every step to its own Parquet file, in a dataset
+partitioned by the parameters (e.g.
+``BankReservesModel_Data/init_people=25/rich_threshold=5/...``). The agent data, the
+wealth of every person at every step, goes to a second dataset with the same
+partitions in the ``_agents`` directory. Finished runs are recorded in
+``_manifest.jsonl`` in the same directory, so an interrupted sweep can be started
+again and only does the runs that are missing. Only one run per worker is held in
+memory at any time.
+
+Read the results back with ``pandas.read_parquet("BankReservesModel_Data")`` and
+``pandas.read_parquet("BankReservesModel_Data/_agents")``.
 """
 
-import mesa
-import pandas as pd
+import argparse
+import itertools
+import json
+import os
+from multiprocessing import Pool
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from bank_reserves.model import BankReservesModel
 
+# Files starting with an underscore are skipped when reading the dataset
+MANIFEST = "_manifest.jsonl"
+AGENTS = "_agents"
+
+
+def make_runs(params, iterations, seed=0):
+    """List every (run_id, params, seed) of the sweep, in a fixed order.
+
+    Run ids and seeds only depend on the position of a run in this list, so they
+    are the same every time the same sweep is started.
+    """
+    params = {k: v if isinstance(v, list) else [v] for k, v in params.items()}
+    combinations = itertools.product(*params.values(), range(iterations))
+    runs = []
+    for run_id, (*values, iteration) in enumerate(combinations):
+        run_params = dict(zip(params, values))
+        run_seed = int(np.random.SeedSequence([seed, run_id]).generate_state(1)[0])
+        runs.append((run_id, {**run_params, "iteration": iteration}, run_seed))
+    return runs
+
+
+def run_path(output, run_id, params):
+    """Where the Parquet file of a run goes, partitioned by the run's parameters."""
+    partition = Path(output)
+    for key, value in params.items():
+        partition /= f"{key}={value}"
+    return partition / f"run-{run_id}.parquet"
+
+
+def read_manifest(output):
+    """Ids of the runs that already finished."""
+    manifest = Path(output) / MANIFEST
+    if not manifest.exists():
+        return set()
+    with open(manifest) as f:
+        return {json.loads(line)["run_id"] for line in f if line.strip()}
+
+
+def write_table(data, path):
+    """Write a DataFrame to a Parquet file, which only appears once complete."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write under a hidden temporary name first, so a crash never leaves half a
+    # file that looks like a finished run
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    pq.write_table(pa.Table.from_pandas(data, preserve_index=False), tmp_path)
+    os.replace(tmp_path, path)
+
+
+def run_one(run, output, max_steps):
+    """Run the model once and write its per-step data; return the manifest entry."""
+    run_id, params, seed = run
+    model_params = {k: v for k, v in params.items() if k != "iteration"}
+    model = BankReservesModel(**model_params, seed=seed)
+    for _ in range(max_steps):
+        if not model.running:
+            break
+        model.step()
+
+    data = model.datacollector.get_model_vars_dataframe()
+    data.insert(0, "Step", data.index)
+    data.insert(0, "RunId", run_id)
+    path = run_path(output, run_id, params)
+    write_table(data, path)
+
+    # Columns Step, AgentID and Wealth
+    agent_data = model.datacollector.get_agent_vars_dataframe().reset_index()
+    agent_data.insert(0, "RunId", run_id)
+    agent_path = run_path(Path(output) / AGENTS, run_id, params)
+    write_table(agent_data, agent_path)
+    return {
+        "run_id": run_id,
+        "seed": seed,
+        "path": str(path),
+        "agent_path": str(agent_path),
+        **params,
+    }
+
+
+def run_one_star(args):
+    return run_one(*args)
+
+
+def batch_run(params, output, iterations=1, max_steps=1000, processes=None, seed=0):
+    """Run all missing runs of the sweep and record them in the manifest.
+
+    Returns:
+        The number of runs done by this call.
+    """
+    Path(output).mkdir(parents=True, exist_ok=True)
+    finished = read_manifest(output)
+    runs = [
+        run for run in make_runs(params, iterations, seed) if run[0] not in finished
+    ]
+
+    with Pool(processes) as pool, open(Path(output) / MANIFEST, "a") as manifest:
+        results = pool.imap_unordered(
+            run_one_star, [(run, output, max_steps) for run in runs]
+        )
+        # Only the parent writes the manifest, one line per finished run
+        for entry in results:
+            manifest.write(json.dumps(entry) + "\n")
+            manifest.flush()
+            os.fsync(manifest.fileno())
+    return len(runs)
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Bank Reserves parameter sweep")
+    parser.add_argument("--output", default="BankReservesModel_Data")
+    parser.add_argument("--iterations", type=int, default=1)
+    parser.add_argument("--max-steps", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
     # parameter lists for each parameter to be tested in batch run
     br_params = {
         "init_people": [25, 100],
@@ -36,13 +162,15 @@ def main():
         "reserve_percent": 5,
     }
 
-    # The existing batch run logic here
-    data = mesa.batch_run(
-        BankReservesModel,
+    done = batch_run(
         br_params,
+        args.output,
+        iterations=args.iterations,
+        max_steps=args.max_steps,
+        processes=args.processes,
+        seed=args.seed,
     )
-    br_df = pd.DataFrame(data)
-    br_df.to_csv("BankReservesModel_Data.csv")
+    print(f"Finished {done} runs, results in {args.output}")
 
 
 if __name__ == "__main__":
@@ -1,3 +1,10 @@
+from delta_cache import (
+    BackgroundCacheWriter,
+    DeltaCacheReader,
+    DeltaCacheWriter,
+    capture_state,
+    restore_state,
+)
 from mesa_replay import CacheableModel, CacheState
 from model import Schelling
 
@@ -12,6 +19,11 @@ class CacheableSchelling(CacheableModel):
     The only difference is that the model will write the state of every simulation step
     to a cache file or when in replay mode use a given cache file to replay that cached
     simulation run.
+
+    Instead of pickling the whole model every step, only the agents' ids, types and
+    cells are cached, written to the file as they are recorded: a full keyframe every
+    ``keyframe_interval`` steps and in between only the agents that moved, compressed
+    with zstd (see delta_cache.py).
     """
 
     def __init__(
@@ -26,6 +38,11 @@ class CacheableSchelling(CacheableModel):
         # Note that this is an additional parameter we add to our model,
         # which decides whether to simulate or replay
         replay=False,
+        keyframe_interval=100,
+        # Encode and write the cache file on a separate thread while recording
+        write_in_background=True,
+        # Step of the cached run to start replaying from
+        start_step=0,
     ):
         actual_model = Schelling(
             width=width,
@@ -36,8 +53,75 @@ class CacheableSchelling(CacheableModel):
             radius=radius,
         )
         cache_state = CacheState.REPLAY if replay else CacheState.RECORD
+        self.keyframe_interval = keyframe_interval
+        self.write_in_background = write_in_background
+        self._cache_writer = None
+        # Ids of the agents in the cache -> agents of the model, see restore_state
+        self._cached_agents = None
         super().__init__(
             model=actual_model,
             cache_file_path=cache_file_path,
             cache_state=cache_state,
         )
+        if replay and start_step > 0:
+            self.seek(int(start_step))
+
+    def _serialize_state(self):
+        """Append the state of the agents to the cache file.
+
+        Nothing is returned, so ``CacheableModel`` does not keep the recorded states
+        in memory.
+        """
+        if self._cache_writer is None:
+            writer_cls = (
+                BackgroundCacheWriter if self.write_in_background else DeltaCacheWriter
+            )
+            self._cache_writer = writer_cls(
+                self.cache_file_path, keyframe_interval=self.keyframe_interval
+            )
+        self._cache_writer.append(capture_state(self.model))
+
+    def _deserialize_state(self, state):
+        self._cached_agents = restore_state(self.model, state, self._cached_agents)
+
+    def step(self):
+        super().step()
+        # Unmap the cache file once its last step has been replayed
+        if isinstance(self.cache, DeltaCacheReader) and self.step_count >= len(
+            self.cache
+        ):
+            self.cache.close()
+
+    def _write_cache_file(self):
+        # The states are already written as they are recorded
+        if self._cache_writer is not None:
+            self._cache_writer.close()
+            self._cache_writer = None
+
+    def seek(self, step):
+        """Show ``step`` of the cached run and continue replaying from there.
+
+        Only the frames from the keyframe before ``step`` are read, and the data
+        collected up to ``step`` is taken from the index of the cache file.
+        """
+        if not isinstance(self.cache, DeltaCacheReader):
+            raise RuntimeError("seek is only possible when replaying a cached run")
+        if self.cache.closed:
+            # The replay had reached the end
+            self._read_cache_file()
+        self._cached_agents = restore_state(
+            self.model, self.cache[step], self._cached_agents
+        )
+        self.model.datacollector.model_vars["happy"] = self.cache.happy[
+            : step + 1
+        ].tolist()
+        # The next step replays the frame after this one
+        self.step_count = step + 1
+
+    def _read_cache_file(self):
+        # Frames are read from the file as they are replayed
+        # A reader of an earlier call is closed first (``seek`` opens a new one)
+        if isinstance(getattr(self, "cache", None), DeltaCacheReader):
+            self.cache.close()
+        self.cache = DeltaCacheReader(self.cache_file_path)
+        return self.cache
@@ -0,0 +1,401 @@
+"""Compact cache file format for Schelling runs.
+
+Instead of a full pickled model per step, the cache stores the state of the agents
+as a full keyframe every ``keyframe_interval`` frames, and in between only a delta:
+the ids and new cells of the agents that moved. Since only unhappy agents move, a
+delta is usually much smaller than a keyframe. Every frame is compressed with zstd
+on its own.
+
+File layout: ``HEADER`` (magic, version and keyframe interval), then one record per
+frame: ``RECORD`` (length of the compressed payload and frame kind) followed by the
+compressed payload. A payload starts with ``PAYLOAD`` (happy agents, running flag
+and number of agents in it), followed by the arrays of agent ids and cells, and for
+keyframes the agent types. Cells are stored as flat indices ``x * height + y``.
+
+A frame is reconstructed from the last keyframe before it by applying the deltas in
+between.
+
+When the writer is closed, it appends an index: ``INDEX`` (number of frames), then
+for every frame the byte offset of its record, the frame number of its keyframe and
+its number of happy agents, as arrays, followed by ``TRAILER`` (offset of the index
+and ``INDEX_MAGIC``). With the index any frame can be found without reading the ones
+before it. A file without an index, for example from a run that was interrupted,
+is read by walking its records, and a record that was cut off at the end is ignored.
+
+``BackgroundCacheWriter`` moves the encoding, compression and writing of frames to a
+separate thread, so recording only costs the model the time to capture its state.
+"""
+
+import mmap
+import queue
+import struct
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import zstandard
+from model import SchellingAgent
+
+MAGIC = b"SCHCACHE"
+VERSION = 1
+HEADER = struct.Struct("<8sHI")
+RECORD = struct.Struct("<IB")
+PAYLOAD = struct.Struct("<qBq")
+INDEX = struct.Struct("<Q")
+INDEX_MAGIC = b"SCHINDEX"
+TRAILER = struct.Struct("<Q8s")
+
+KEYFRAME = 0
+DELTA = 1
+
+
+@dataclass
+class SchellingState:
+    """State of a Schelling model at one step, agents sorted by id."""
+
+    ids: np.ndarray
+    types: np.ndarray
+    cells: np.ndarray
+    happy: int
+    running: bool
+
+
+def capture_state(model):
+    """The ``SchellingState`` of ``model``, in a single pass over its agents."""
+    height = model.height
+    values = np.fromiter(
+        (
+            value
+            for agent in model.agents
+            for value in (
+                agent.unique_id,
+                agent.type,
+                agent.cell.coordinate[0] * height + agent.cell.coordinate[1],
+            )
+        ),
+        dtype=np.int64,
+        count=3 * len(model.agents),
+    ).reshape(-1, 3)
+    values = values[np.argsort(values[:, 0], kind="stable")]
+    return SchellingState(
+        ids=values[:, 0],
+        types=values[:, 1].astype(np.int8),
+        cells=values[:, 2].astype(np.int32),
+        happy=int(model.happy),
+        running=bool(model.running),
+    )
+
+
+def restore_state(model, state, agents=None):
+    """Put the agents of ``model`` where they are in ``state`` and collect its data.
+
+    ``agents`` maps the ids in the cache to the agents of ``model``; if it is None,
+    the agents are looked up by their own ids. Only the agents that are somewhere
+    else are moved. If ``model`` has other agents than ``state``, all agents are
+    replaced by new ones, created in the order of ``state``, and the collected data
+    is cleared.
+
+    Returns:
+        The map from ids in the cache to agents, to pass to the next call.
+    """
+    if agents is None:
+        agents = {agent.unique_id: agent for agent in model.agents}
+    height = model.height
+    ordered = [agents.get(int(unique_id)) for unique_id in state.ids]
+    if len(agents) == len(state.ids) and all(
+        agent is not None and agent.type == agent_type
+        for agent, agent_type in zip(ordered, state.types)
+    ):
+        cells = np.fromiter(
+            (
+                agent.cell.coordinate[0] * height + agent.cell.coordinate[1]
+                for agent in ordered
+            ),
+            dtype=np.int64,
+            count=len(ordered),
+        )
+        for i in np.flatnonzero(cells != state.cells):
+            ordered[i].cell = model.grid[divmod(int(state.cells[i]), height)]
+    else:
+        for agent in list(model.agents):
+            agent.remove()
+        for values in model.datacollector.model_vars.values():
+            values.clear()
+        agents = {}
+        for unique_id, agent_type, cell in zip(state.ids, state.types, state.cells):
+            agent = SchellingAgent(model, int(agent_type))
+            agent.cell = model.grid[divmod(int(cell), height)]
+            agents[int(unique_id)] = agent
+
+    model.happy = state.happy
+    model.running = state.running
+    model.datacollector.collect(model)
+    return agents
+
+
+def encode_keyframe(state):
+    header = PAYLOAD.pack(state.happy, state.running, len(state.ids))
+    return b"".join(
+        [
+            header,
+            state.ids.astype("<i8").tobytes(),
+            state.cells.astype("<i4").tobytes(),
+            state.types.astype("i1").tobytes(),
+        ]
+    )
+
+
+def encode_delta(state, previous):
+    moved = np.flatnonzero(state.cells != previous.cells)
+    header = PAYLOAD.pack(state.happy, state.running, len(moved))
+    return b"".join(
+        [
+            header,
+            state.ids[moved].astype("<i8").tobytes(),
+            state.cells[moved].astype("<i4").tobytes(),
+        ]
+    )
+
+
+def decode(kind, payload, previous=None):
+    """The state of a frame, from its payload and for deltas the state before it."""
+    happy, running, n = PAYLOAD.unpack_from(payload)
+    offset = PAYLOAD.size
+    ids = np.frombuffer(payload, dtype="<i8", count=n, offset=offset)
+    cells = np.frombuffer(payload, dtype="<i4", count=n, offset=offset + 8 * n)
+    if kind == KEYFRAME:
+        types = np.frombuffer(payload, dtype="i1", count=n, offset=offset + 12 * n)
+        return SchellingState(
+            ids.astype(np.int64), types.copy(), cells.copy(), happy, bool(running)
+        )
+    new_cells = previous.cells.copy()
+    new_cells[np.searchsorted(previous.ids, ids)] = cells
+    return SchellingState(previous.ids, previous.types, new_cells, happy, bool(running))
+
+
+class DeltaCacheWriter:
+    """Append the states of a run to a cache file, as keyframes and deltas.
+
+    Args:
+        path: File to write, overwritten if it exists.
+        keyframe_interval: A keyframe is written every this many frames. A keyframe
+            is also written whenever the set of agents changed.
+        level: zstd compression level.
+    """
+
+    def __init__(self, path, keyframe_interval=100, level=3):
+        self.path = Path(path)
+        self.keyframe_interval = keyframe_interval
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._file = self.path.open("wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, keyframe_interval))
+        self._previous = None
+        self.num_frames = 0
+        # Offset, keyframe and happy agents of every frame, for the index
+        self._offsets = []
+        self._keyframes = []
+        self._happy = []
+
+    def append(self, state):
+        previous = self._previous
+        if (
+            previous is None
+            or self.num_frames % self.keyframe_interval == 0
+            or not np.array_equal(state.ids, previous.ids)
+        ):
+            kind, payload = KEYFRAME, encode_keyframe(state)
+        else:
+            kind, payload = DELTA, encode_delta(state, previous)
+        compressed = self._compressor.compress(payload)
+        self._offsets.append(self._file.tell())
+        self._keyframes.append(
+            self.num_frames if kind == KEYFRAME else self._keyframes[-1]
+        )
+        self._happy.append(state.happy)
+        self._file.write(RECORD.pack(len(compressed), kind))
+        self._file.write(compressed)
+        # A run that stops is readable up to its last complete frame
+        self._file.flush()
+        self._previous = state
+        self.num_frames += 1
+
+    def close(self):
+        """Write the index and close the file."""
+        index_offset = self._file.tell()
+        self._file.write(INDEX.pack(self.num_frames))
+        self._file.write(np.array(self._offsets, dtype="<u8").tobytes())
+        self._file.write(np.array(self._keyframes, dtype="<u4").tobytes())
+        self._file.write(np.array(self._happy, dtype="<i8").tobytes())
+        self._file.write(TRAILER.pack(index_offset, INDEX_MAGIC))
+        self._file.close()
+
+
+class BackgroundCacheWriter:
+    """A ``DeltaCacheWriter`` that encodes and writes states on a separate thread.
+
+    ``append`` only puts the state in a queue, which holds at most ``max_queued``
+    states. If the thread falls behind and the queue is full, ``append`` waits for it,
+    so memory use stays bounded. Every frame is flushed to the file once it is
+    written, so if the process stops, all frames written up to then can be read.
+
+    An error on the thread is raised by the next call to ``append`` or ``close``.
+
+    Args:
+        path: File to write, overwritten if it exists.
+        keyframe_interval: A keyframe is written every this many frames.
+        level: zstd compression level.
+        max_queued: Number of states that can wait to be written.
+    """
+
+    def __init__(self, path, keyframe_interval=100, level=3, max_queued=64):
+        self._writer = DeltaCacheWriter(path, keyframe_interval, level)
+        self.path = self._writer.path
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._write_states, name="cache writer", daemon=True
+        )
+        self._thread.start()
+
+    def _write_states(self):
+        while True:
+            state = self._queue.get()
+            if state is None:
+                return
+            if self._error is None:
+                try:
+                    self._writer.append(state)
+                except Exception as error:
+                    # Keep emptying the queue, so append never waits forever
+                    self._error = error
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError(f"Writing {self.path} failed") from self._error
+
+    @property
+    def num_frames(self):
+        """Number of frames written so far, not counting the queued ones."""
+        return self._writer.num_frames
+
+    def append(self, state):
+        self._raise_error()
+        self._queue.put(state)
+
+    def close(self):
+        """Wait until all queued states are written, then write the index."""
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_error()
+        self._writer.close()
+
+
+class DeltaCacheReader:
+    """The frames of a cache file as a read-only sequence of ``SchellingState``.
+
+    Reading frames in order applies one delta per frame, any other frame is
+    reconstructed from the keyframe before it. The file stays mapped in memory until
+    ``close`` is called; the reader can also be used as a context manager.
+
+    Attributes:
+        offsets: Byte offset of the record of every frame.
+        keyframes: Frame number of the keyframe of every frame.
+        happy: Number of happy agents in every frame.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._decompressor = zstandard.ZstdDecompressor()
+        with self.path.open("rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.keyframe_interval = HEADER.unpack_from(self._data)
+        if magic != MAGIC or version != VERSION:
+            self._data.close()
+            raise ValueError(f"{path} is not a Schelling cache file")
+
+        if not self._read_index():
+            self._scan_records()
+        self._last = None
+
+    def _read_index(self):
+        """Read the index at the end of the file; return False if there is none."""
+        data = self._data
+        if len(data) < HEADER.size + INDEX.size + TRAILER.size:
+            return False
+        index_offset, magic = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+        if magic != INDEX_MAGIC:
+            return False
+        (n,) = INDEX.unpack_from(data, index_offset)
+        offset = index_offset + INDEX.size
+        # Copied, so the index stays valid, and the file can be closed, without
+        # views into it
+        self.offsets = np.frombuffer(data, dtype="<u8", count=n, offset=offset).copy()
+        self.keyframes = np.frombuffer(
+            data, dtype="<u4", count=n, offset=offset + 8 * n
+        ).copy()
+        self.happy = np.frombuffer(
+            data, dtype="<i8", count=n, offset=offset + 12 * n
+        ).copy()
+        return True
+
+    def _scan_records(self):
+        """Build the index by walking the records, up to the last complete one."""
+        offsets, keyframes = [], []
+        offset = HEADER.size
+        while offset + RECORD.size <= len(self._data):
+            length, kind = RECORD.unpack_from(self._data, offset)
+            if offset + RECORD.size + length > len(self._data):
+                break
+            offsets.append(offset)
+            keyframes.append(len(keyframes) if kind == KEYFRAME else keyframes[-1])
+            offset += RECORD.size + length
+        self.offsets = np.array(offsets, dtype=np.uint64)
+        self.keyframes = np.array(keyframes, dtype=np.uint32)
+        self.happy = np.array(
+            [PAYLOAD.unpack_from(self._payload(i)[1])[0] for i in range(len(offsets))],
+            dtype=np.int64,
+        )
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def closed(self):
+        return self._data.closed
+
+    def close(self):
+        """Unmap the file. The index can still be used, the frames cannot."""
+        self._data.close()
+        self._last = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _payload(self, index):
+        offset = int(self.offsets[index])
+        length, kind = RECORD.unpack_from(self._data, offset)
+        start = offset + RECORD.size
+        return kind, self._decompressor.decompress(self._data[start : start + length])
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Frame {index} is not in the cache")
+        if self.closed:
+            raise ValueError(f"{self.path} is closed")
+
+        keyframe = int(self.keyframes[index])
+        if self._last is not None and keyframe <= self._last[0] <= index:
+            # Continue from the last frame read
+            start, state = self._last
+        else:
+            start, state = keyframe, decode(*self._payload(keyframe))
+        for frame in range(start + 1, index + 1):
+            state = decode(*self._payload(frame), previous=state)
+        self._last = (index, state)
+        return state
@@ -6,6 +6,7 @@ from server import canvas_element, get_happy_agents, happy_chart, model_params
 
 # As 'replay' is a simulation model parameter in this example, we need to make it available as such
 model_params["replay"] = mesa.visualization.Checkbox("Replay cached run?", False)
+model_params["start_step"] = mesa.visualization.NumberInput("Start replay at step", 0)
 model_params["cache_file_path"] = "./my_cache_file_path.cache"
 
 
@@ -62,35 +62,40 @@ class Person(CellAgent):
         # person's bank, set at __init__, all people have the same bank in this model
         self.bank = bank
 
+    @property
+    def cell(self):
+        return self._mesa_cell
+
+    @cell.setter
+    def cell(self, cell):
+        # keep the model's occupancy index in sync with every move
+        self.model.occupancy.move(self, CellAgent.cell.fget(self), cell)
+        CellAgent.cell.fset(self, cell)
+
     def do_business(self):
         """Check if person has any savings, any money in wallet, or if the
         bank can loan them any money
         """
-        if self.savings > 0 or self.wallet > 0 or self.bank.bank_to_loan > 0:
-            # create list of people at my location (includes self)
-            my_cell = [a for a in self.cell.agents if a != self]
-            # check if other people are at my location
-            if len(my_cell) > 1:
-                # set customer to self for while loop condition
-                customer = self
-                while customer == self:
-                    # select a random person from the people at my location
-                    # to trade with
-                    customer = self.random.choice(my_cell)
-                # 50% chance of trading with customer
+        # check if other people (at least two) are at my location
+        if (
+            self.savings > 0 or self.wallet > 0 or self.bank.bank_to_loan > 0
+        ) and self.model.occupancy.count(self.cell) - 1 > 1:
+            # select a random other person at my location to trade with
+            customer = self.model.occupancy.draw_other(self, self.cell, self.random)
+            # 50% chance of trading with customer
+            if self.random.randint(0, 1) == 0:
+                # 50% chance of trading $5
                 if self.random.randint(0, 1) == 0:
-                    # 50% chance of trading $5
-                    if self.random.randint(0, 1) == 0:
-                        # give customer $5 from my wallet
-                        # (may result in negative wallet)
-                        customer.wallet += 5
-                        self.wallet -= 5
-                    # 50% chance of trading $2
-                    else:
-                        # give customer $2 from my wallet
-                        # (may result in negative wallet)
-                        customer.wallet += 2
-                        self.wallet -= 2
+                    # give customer $5 from my wallet
+                    # (may result in negative wallet)
+                    customer.wallet += 5
+                    self.wallet -= 5
+                # 50% chance of trading $2
+                else:
+                    # give customer $2 from my wallet
+                    # (may result in negative wallet)
+                    customer.wallet += 2
+                    self.wallet -= 2
 
     def balance_books(self):
         # check if wallet is negative from trading with customer
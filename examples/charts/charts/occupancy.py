@@ -0,0 +1,55 @@
+"""Index of the people on every cell of the grid.
+
+This module is a copy of the one in the bank_reserves example, which this example
+modifies. Every example is self-contained, so the two copies are kept the same by
+hand.
+"""
+
+
+class OccupancyIndex:
+    """People per cell, kept up to date as they move.
+
+    Every cell has a bucket (a list) of the people on it, and every person knows
+    its slot in its bucket. Moving removes a person by swapping it with the last
+    person of its old bucket, so adding, removing and drawing a random other person
+    on the same cell are all O(1), however crowded the cell is.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._slots = {}
+
+    def add(self, person, cell):
+        bucket = self._buckets.setdefault(cell, [])
+        self._slots[person] = len(bucket)
+        bucket.append(person)
+
+    def remove(self, person, cell):
+        bucket = self._buckets[cell]
+        slot = self._slots.pop(person)
+        last = bucket.pop()
+        if last is not person:
+            # fill the gap with the last person of the bucket
+            bucket[slot] = last
+            self._slots[last] = slot
+
+    def move(self, person, old_cell, new_cell):
+        if old_cell is not None:
+            self.remove(person, old_cell)
+        if new_cell is not None:
+            self.add(person, new_cell)
+
+    def count(self, cell):
+        """Number of people on ``cell``."""
+        return len(self._buckets.get(cell, ()))
+
+    def draw_other(self, person, cell, random):
+        """A random person on ``cell`` other than ``person``, or None if it is alone."""
+        bucket = self._buckets.get(cell, ())
+        if len(bucket) < 2:
+            return None
+        # Draw among the other slots, skipping over the person's own slot
+        slot = random.randrange(len(bucket) - 1)
+        if slot >= self._slots[person]:
+            slot += 1
+        return bucket[slot]
@@ -0,0 +1,92 @@
+"""Stream the wealth of every person to a Parquet file instead of keeping it in memory.
+
+The DataCollector keeps agent-level data as Python tuples for every step, which
+grows without bound for large populations and long runs. ``WealthStream`` writes
+the wealth column of each step to disk instead, a few steps per Parquet row group,
+so memory use stays constant. ``read_wealth`` reads back a range of steps using the
+row group statistics, without loading the rest of the file.
+
+This module is a copy of the one in the bank_reserves example, which this example
+modifies. Every example is self-contained, so the two copies are kept the same by
+hand.
+"""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SCHEMA = pa.schema(
+    [("Step", pa.int64()), ("AgentID", pa.int64()), ("Wealth", pa.float64())]
+)
+
+
+class WealthStream:
+    """Append the wealth of all people at each step to a Parquet file.
+
+    Args:
+        path: File to write, overwritten if it exists.
+        steps_per_group: Number of steps buffered in memory and written together
+            as one row group.
+    """
+
+    def __init__(self, path, steps_per_group=10):
+        self.path = path
+        self.steps_per_group = steps_per_group
+        self._writer = pq.ParquetWriter(path, SCHEMA)
+        self._buffer = []
+
+    def write(self, step, agent_ids, wealth):
+        """Add one step; ``agent_ids`` and ``wealth`` are arrays of equal length."""
+        agent_ids = np.asarray(agent_ids, dtype=np.int64)
+        self._buffer.append(
+            pa.record_batch(
+                [
+                    pa.array(np.full(len(agent_ids), step, dtype=np.int64)),
+                    pa.array(agent_ids),
+                    pa.array(np.asarray(wealth, dtype=np.float64)),
+                ],
+                schema=SCHEMA,
+            )
+        )
+        if len(self._buffer) >= self.steps_per_group:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._writer.write_table(pa.Table.from_batches(self._buffer))
+            self._buffer = []
+
+    def close(self):
+        """Write the remaining steps and the file footer; needed before reading."""
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+
+
+def read_wealth(path, start=None, stop=None):
+    """Wealth of all people for ``start <= Step < stop`` as a DataFrame.
+
+    Only the row groups that can contain these steps are read.
+    """
+    parquet_file = pq.ParquetFile(path)
+    step_column = parquet_file.schema_arrow.get_field_index("Step")
+    row_groups = []
+    for i in range(parquet_file.num_row_groups):
+        statistics = parquet_file.metadata.row_group(i).column(step_column).statistics
+        if start is not None and statistics.max < start:
+            continue
+        if stop is not None and statistics.min >= stop:
+            continue
+        row_groups.append(i)
+
+    if not row_groups:
+        return SCHEMA.empty_table().to_pandas()
+    table = parquet_file.read_row_groups(row_groups)
+    data = table.to_pandas()
+    mask = np.ones(len(data), dtype=bool)
+    if start is not None:
+        mask &= data["Step"].to_numpy() >= start
+    if stop is not None:
+        mask &= data["Step"].to_numpy() < stop
+    return data[mask].reset_index(drop=True)
@@ -0,0 +1,65 @@
+"""Compare the throughput of the Game of Life engines in cell updates per second.
+
+Run from this directory, e.g. ``python benchmark.py --size 10000 --steps 5``. Every
+engine starts from the same random world and the final worlds are checked to be
+equal. The bit-packed engines are run with every number of threads given with
+``--threads``.
+"""
+
+import argparse
+import time
+
+import numpy as np
+from model import GameOfLifeModel
+
+# Hashlife is left out, stepping a random world one generation at a time is not
+# what it is good at
+ENGINES = ["convolve", "bitpacked", "sparse"]
+
+
+def run(engine, size, steps, seed, threads=1):
+    """Return seconds per step and the final cells of one run."""
+    np.random.seed(seed)
+    model = GameOfLifeModel(
+        width=size, height=size, alive_fraction=0.3, engine=engine, threads=threads
+    )
+    start = time.perf_counter()
+    for _ in range(steps):
+        model.step()
+    return (time.perf_counter() - start) / steps, model.get_cells()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=4000)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engines", nargs="+", default=ENGINES, choices=ENGINES)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1])
+    args = parser.parse_args()
+
+    runs = [
+        (engine, threads)
+        for engine in args.engines
+        for threads in ([1] if engine == "convolve" else args.threads)
+    ]
+
+    cells = args.size * args.size
+    print(f"World of {args.size} x {args.size} cells, {args.steps} steps")
+    print(f"{'Engine':<12}{'Threads':>8}{'s/step':>10}{'cells/s':>12}{'speedup':>10}")
+    baseline = reference = None
+    for engine, threads in runs:
+        seconds, final = run(engine, args.size, args.steps, args.seed, threads)
+        baseline = baseline or seconds
+        if reference is None:
+            reference = final
+        elif not np.array_equal(final, reference):
+            raise RuntimeError(f"{engine} with {threads} threads does not match")
+        print(
+            f"{engine:<12}{threads:>8}{seconds:>10.4f}{cells / seconds:>12.2e}"
+            f"{baseline / seconds:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
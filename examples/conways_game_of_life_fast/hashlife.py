@@ -0,0 +1,221 @@
+"""Hashlife: Game of Life on a memoized quadtree.
+
+A world of ``2**k x 2**k`` cells is a quadtree node of level ``k``: four nodes of
+level ``k - 1`` (its quadrants), down to single cells at level 0. Nodes are
+interned, so equal regions of the world, in space or in time, are the same node,
+and the result of advancing a node is memoized. Worlds with repeating structure,
+such as mostly empty, still or periodic patterns, can then be advanced by huge
+numbers of generations at the cost of a few new nodes.
+
+``successor(node, j)`` returns the center half of a node after ``2**j``
+generations. To advance the toroidal world, it is tiled 2 x 2 into a node one
+level up. Its center after up to ``2**(k - 1)`` generations is the world after
+those generations, shifted by half its size, since everything outside the center
+is far enough away to not be affected by the edges of the tiling.
+"""
+
+import numpy as np
+
+
+class Node:
+    """A square of ``2**level x 2**level`` cells. Create nodes with ``HashLife.join``."""
+
+    __slots__ = ("level", "ne", "nw", "population", "se", "sw")
+
+    def __init__(self, level, nw, ne, sw, se, population):
+        self.level = level
+        self.nw, self.ne, self.sw, self.se = nw, ne, sw, se
+        self.population = population
+
+
+# The two cells, the leaves of every tree
+DEAD = Node(0, None, None, None, None, 0)
+ALIVE = Node(0, None, None, None, None, 1)
+
+
+class HashLife:
+    """Node store and memoized successors of one or more quadtrees.
+
+    Args:
+        max_cache: If more nodes than this are stored, all stored nodes and results
+            are dropped before the next jump. Results stay correct, but have to be
+            computed again.
+    """
+
+    def __init__(self, max_cache=5_000_000):
+        self.max_cache = max_cache
+        self.clear()
+
+    def clear(self):
+        self._nodes = {}
+        self._successors = {}
+
+    def __len__(self):
+        """Number of stored nodes."""
+        return len(self._nodes)
+
+    def join(self, nw, ne, sw, se):
+        """The interned node with the given quadrants."""
+        # Nodes are interned, so they can be compared and hashed by identity
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            population = nw.population + ne.population + sw.population + se.population
+            node = Node(nw.level + 1, nw, ne, sw, se, population)
+            self._nodes[key] = node
+        return node
+
+    def life_4x4(self, node):
+        """The 2 x 2 center of a level 2 node after one generation."""
+        cells = np.zeros((4, 4), dtype=int)
+        for x, row in enumerate(((node.nw, node.ne), (node.sw, node.se))):
+            for y, quadrant in enumerate(row):
+                cells[2 * x : 2 * x + 2, 2 * y : 2 * y + 2] = [
+                    [quadrant.nw.population, quadrant.ne.population],
+                    [quadrant.sw.population, quadrant.se.population],
+                ]
+        center = []
+        for x in (1, 2):
+            for y in (1, 2):
+                neighbors = cells[x - 1 : x + 2, y - 1 : y + 2].sum() - cells[x, y]
+                alive = neighbors == 3 or (neighbors == 2 and cells[x, y])
+                center.append(ALIVE if alive else DEAD)
+        return self.join(*center)
+
+    def successor(self, node, j):
+        """The center of ``node``, one level down, after ``2**j`` generations.
+
+        ``j`` is at most ``node.level - 2``, the most the center can be advanced
+        without being affected by what is outside of ``node``.
+        """
+        if node.population == 0:
+            return node.nw
+        key = (node, j)
+        result = self._successors.get(key)
+        if result is not None:
+            return result
+
+        if node.level == 2:
+            result = self.life_4x4(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            join = self.join
+            # The nine overlapping sub-squares of half the size, advanced by up to
+            # half the generations
+            sub_j = min(j, node.level - 3)
+            c1 = self.successor(nw, sub_j)
+            c2 = self.successor(join(nw.ne, ne.nw, nw.se, ne.sw), sub_j)
+            c3 = self.successor(ne, sub_j)
+            c4 = self.successor(join(nw.sw, nw.se, sw.nw, sw.ne), sub_j)
+            c5 = self.successor(join(nw.se, ne.sw, sw.ne, se.nw), sub_j)
+            c6 = self.successor(join(ne.sw, ne.se, se.nw, se.ne), sub_j)
+            c7 = self.successor(sw, sub_j)
+            c8 = self.successor(join(sw.ne, se.nw, sw.se, se.sw), sub_j)
+            c9 = self.successor(se, sub_j)
+            if j < node.level - 2:
+                # They are already advanced by 2**j, only take their centers
+                result = join(
+                    join(c1.se, c2.sw, c4.ne, c5.nw),
+                    join(c2.se, c3.sw, c5.ne, c6.nw),
+                    join(c4.se, c5.sw, c7.ne, c8.nw),
+                    join(c5.se, c6.sw, c8.ne, c9.nw),
+                )
+            else:
+                # Advance them by another 2**(j - 1) generations
+                result = join(
+                    self.successor(join(c1, c2, c4, c5), sub_j),
+                    self.successor(join(c2, c3, c5, c6), sub_j),
+                    self.successor(join(c4, c5, c7, c8), sub_j),
+                    self.successor(join(c5, c6, c8, c9), sub_j),
+                )
+        self._successors[key] = result
+        return result
+
+    def from_array(self, cells):
+        """The node of a ``2**k x 2**k`` bool array, indexed ``[x, y]``."""
+        nodes = np.where(cells, ALIVE, DEAD).astype(object)
+        while nodes.shape[0] > 1:
+            nodes = np.array(
+                [
+                    [
+                        self.join(
+                            nodes[x, y],
+                            nodes[x, y + 1],
+                            nodes[x + 1, y],
+                            nodes[x + 1, y + 1],
+                        )
+                        for y in range(0, nodes.shape[1], 2)
+                    ]
+                    for x in range(0, nodes.shape[0], 2)
+                ],
+                dtype=object,
+            )
+        return nodes[0, 0]
+
+    def to_array(self, node):
+        """The bool array of the cells of ``node``, the inverse of ``from_array``."""
+        size = 2**node.level
+        cells = np.zeros((size, size), dtype=bool)
+        stack = [(node, 0, 0)]
+        while stack:
+            node, x, y = stack.pop()
+            if node.population == 0:
+                continue
+            if node.level == 0:
+                cells[x, y] = True
+                continue
+            half = 2 ** (node.level - 1)
+            stack.append((node.nw, x, y))
+            stack.append((node.ne, x, y + half))
+            stack.append((node.sw, x + half, y))
+            stack.append((node.se, x + half, y + half))
+        return cells
+
+
+class HashLifeWorld:
+    """A toroidal Game of Life world stepped with Hashlife.
+
+    Args:
+        cells: Initial bool array, square with a side that is a power of two.
+        hashlife: Node store to use, a new one by default.
+    """
+
+    def __init__(self, cells, hashlife=None):
+        size = cells.shape[0]
+        if cells.shape != (size, size) or size < 2 or size & (size - 1):
+            raise ValueError(
+                "Hashlife needs a square world with a side that is a power of two, "
+                f"not {cells.shape[0]} x {cells.shape[1]}"
+            )
+        self.hashlife = HashLife() if hashlife is None else hashlife
+        self.root = self.hashlife.from_array(cells)
+
+    @property
+    def cells(self):
+        """The cells as a bool array, indexed ``[x, y]``."""
+        return self.hashlife.to_array(self.root)
+
+    def count_alive(self):
+        return self.root.population
+
+    def jump(self, j):
+        """Advance by ``2**j`` generations, at most half the side of the world."""
+        hashlife, root = self.hashlife, self.root
+        if len(hashlife) > hashlife.max_cache:
+            hashlife.clear()
+            root = hashlife.from_array(self.cells)
+        # The center of the world tiled 2 x 2 is the world shifted by half its size,
+        # swap the quadrants of the result to shift it back
+        center = hashlife.successor(hashlife.join(root, root, root, root), j)
+        self.root = hashlife.join(center.se, center.sw, center.ne, center.nw)
+
+    def step(self):
+        self.jump(0)
+
+    def fast_forward(self, generations):
+        """Advance by ``generations``, in as few jumps of powers of two as possible."""
+        max_j = self.root.level - 1
+        while generations > 0:
+            j = min(generations.bit_length() - 1, max_j)
+            self.jump(j)
+            generations -= 2**j
@@ -0,0 +1,116 @@
+"""Record the generations of a Game of Life world to a file and read them back.
+
+Every frame is one generation, bit-packed in the layout of bitpacked.py: one row of
+``ceil(height / 64)`` little-endian 64 bit words per ``x``, with the unused bits at
+the end of each row set to 0, preceded by the step of the generation. Frames are
+appended to the file as the model runs. ``Frames`` maps the file into memory, so any
+generation can be read, replayed or compared with another one later, without
+simulating again and without loading the other frames.
+
+File layout: the 8 byte ``MAGIC``, the width and height as 64 bit integers, then
+the frames.
+"""
+
+import numpy as np
+
+try:
+    from .bitpacked import popcount, unpack
+except ImportError:
+    # Imported as a top-level module, e.g. from this directory
+    from bitpacked import popcount, unpack
+
+MAGIC = b"GOLFRAME"
+HEADER = np.dtype([("magic", "S8"), ("width", "<u8"), ("height", "<u8")])
+
+
+def frame_dtype(width, height):
+    return np.dtype([("step", "<u8"), ("words", "<u8", (width, -(-height // 64)))])
+
+
+class FrameRecorder:
+    """Append the generations of a ``width x height`` world to ``path``.
+
+    Args:
+        path: File to write, overwritten if it exists.
+        width: Number of rows of the world.
+        height: Number of cells per row.
+    """
+
+    def __init__(self, path, width, height):
+        self.path = path
+        self.width, self.height = width, height
+        # One frame, reused for every generation
+        self._frame = np.zeros((), dtype=frame_dtype(width, height))
+        last = (height - 1) % 64
+        self._last_word_mask = np.uint64(2 ** (last + 1) - 1)
+        self._file = open(path, "wb")  # noqa: SIM115
+        self._file.write(np.array((MAGIC, width, height), dtype=HEADER).tobytes())
+
+    def append(self, step, words):
+        """Add the generation of ``step``, given as bit-packed ``words``.
+
+        The unused bits of the last word of each row of ``words`` are ignored.
+        """
+        self._frame["step"] = step
+        frame_words = self._frame["words"]
+        np.copyto(frame_words, words)
+        np.bitwise_and(frame_words[:, -1], self._last_word_mask, out=frame_words[:, -1])
+        self._file.write(memoryview(self._frame.reshape(1)).cast("B"))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class Frames:
+    """The frames of a file written by ``FrameRecorder``, mapped into memory."""
+
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=HEADER, count=1)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a Game of Life frame file")
+        self.width, self.height = int(header["width"]), int(header["height"])
+        self._frames = np.memmap(
+            path,
+            dtype=frame_dtype(self.width, self.height),
+            mode="r",
+            offset=HEADER.itemsize,
+        )
+
+    def __len__(self):
+        return len(self._frames)
+
+    @property
+    def steps(self):
+        """The step of every frame."""
+        return self._frames["step"]
+
+    def index(self, step):
+        """Position of the frame of ``step``."""
+        index = int(np.searchsorted(self.steps, step))
+        if index == len(self) or self.steps[index] != step:
+            raise KeyError(f"Step {step} was not recorded")
+        return index
+
+    def words(self, step):
+        """The bit-packed cells of ``step``, a read-only view of the file."""
+        return self._frames["words"][self.index(step)]
+
+    def cells(self, step):
+        """The cells of ``step`` as a bool array, indexed ``[x, y]``."""
+        return unpack(self.words(step), self.height)
+
+    def count_alive(self, step):
+        return popcount(self.words(step))
+
+    def diff(self, step, other):
+        """Bool array of the cells that differ between ``step`` and ``other``."""
+        return unpack(self.words(step) ^ self.words(other), self.height)
+
+    def replay(self, start=None, stop=None):
+        """Yield ``(step, cells)`` for every recorded ``start <= step < stop``."""
+        steps = self.steps
+        first = 0 if start is None else int(np.searchsorted(steps, start))
+        last = len(self) if stop is None else int(np.searchsorted(steps, stop))
+        for index in range(first, last):
+            yield int(steps[index]), unpack(self._frames["words"][index], self.height)
@@ -235,7 +235,7 @@ def make_price_changes_line_chart(model):
     fig = Figure(figsize=(8, 5), dpi=100)
     ax = fig.subplots()
 
-    model_data = model.datacollector.get_model_vars_dataframe()
+    model_data = model.get_store_state_dataframe()
 
     # Retrieve agent colors based on their portrayal
     agent_colors = {
@@ -271,7 +271,7 @@ def make_market_share_line_chart(model):
     fig = Figure(figsize=(8, 5), dpi=100)
     ax = fig.subplots()
 
-    model_data = model.datacollector.get_model_vars_dataframe()
+    model_data = model.get_store_state_dataframe()
 
     # Retrieve agent colors based on their portrayal
     agent_colors = {
@@ -307,7 +307,7 @@ def make_revenue_line_chart(model):
     fig = Figure(figsize=(8, 5), dpi=100)
     ax = fig.subplots()
 
-    model_data = model.datacollector.get_model_vars_dataframe()
+    model_data = model.get_store_state_dataframe()
 
     # Retrieve agent colors based on their portrayal
     agent_colors = {
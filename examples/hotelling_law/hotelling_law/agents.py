@@ -24,15 +24,10 @@ class StoreAgent(CellAgent):
         self.cell = cell
 
     def estimate_market_share(self, new_position=None):
+        # Number of consumers within radius 8 of the position, looked up in the
+        # model's raster instead of walking the neighborhood
         position = new_position if new_position else self.cell
-        nearby_consumers = position.get_neighborhood(radius=8).agents
-
-        # Filter nearby agents to include only ConsumerAgents.
-        nearby_consumers = [
-            agent for agent in nearby_consumers if isinstance(agent, ConsumerAgent)
-        ]
-        market_share = len(nearby_consumers)
-        return market_share
+        return int(self.model.market_estimate[position.coordinate])
 
     def estimate_revenue(self, new_price=None):
         # Estimate revenue as product of price and market share
@@ -117,28 +112,15 @@ class StoreAgent(CellAgent):
         self.previous_market_share = current_market_share
 
     def identify_competitors(self):
-        competitors = []
-        for agent in self.model.agents_by_type[StoreAgent]:
-            if agent is not self:
-                # Estimate market overlap as a measure of competition
-                overlap = self.estimate_market_overlap(agent)
-                if overlap > 0:  # If there's any market overlap,
-                    # consider them competitors
-                    competitors.append(agent)
-        return competitors
+        # Stores that contest some of the same consumers, read from the
+        # competition graph the model builds once per step
+        return self.model.competitors_of(self)
 
     def estimate_market_overlap(self, other_store):
-        """Estimate market overlap between this store and another store.
-        This could be based on shared consumer base or other factors.
+        """Estimate market overlap between this store and another store,
+        as the number of consumers both of them compete for.
         """
-        overlap = 0
-
-        for consumer in self.model.agents_by_type[ConsumerAgent]:
-            preferred_store = consumer.determine_preferred_store()
-            if preferred_store in (self, other_store):
-                overlap += 1
-
-        return overlap
+        return self.model.market_overlap(self, other_store)
 
     def step(self):
         # Defines the actions the store agent takes
@@ -207,4 +189,6 @@ class ConsumerAgent(CellAgent):
         return math.sqrt(dx * dx + dy * dy)
 
     def step(self):
-        self.preferred_store = self.determine_preferred_store()
+        # ``preferred_store`` is set for all consumers at once by
+        # ``HotellingModel.recalculate_market_share`` at the end of every step
+        pass
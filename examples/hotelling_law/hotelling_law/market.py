@@ -0,0 +1,100 @@
+import numpy as np
+
+# Radius of the neighborhood a store considers as its market
+MARKET_RADIUS = 8
+
+
+def score_matrix(consumer_positions, store_positions, prices, preference):
+    """Score of every store for every consumer, as a consumers x stores matrix.
+
+    Lower is better. This is the vectorized version of the loop in
+    ``ConsumerAgent.determine_preferred_store``: depending on ``preference`` the score
+    is the Euclidean distance to the store ("proximity"), its price ("price"), or
+    both added together ("default").
+    """
+    if preference == "price":
+        return np.broadcast_to(prices, (len(consumer_positions), len(prices)))
+
+    diff = consumer_positions[:, np.newaxis, :] - store_positions[np.newaxis, :, :]
+    distance = np.sqrt((diff * diff).sum(axis=-1))
+    if preference == "proximity":
+        return distance
+    return prices + distance
+
+
+def choose_stores(scores, rng):
+    """Index of the best scoring store per consumer, breaking ties at random."""
+    is_best = scores == scores.min(axis=1, keepdims=True)
+    # A random key per tied store picks one of them uniformly
+    keys = np.where(is_best, rng.random(scores.shape), -1.0)
+    return keys.argmax(axis=1)
+
+
+def assign_consumers(consumer_positions, store_positions, prices, preference, rng):
+    """Preferred store of each consumer and the resulting market share per store.
+
+    Args:
+        consumer_positions: ``(n_consumers, 2)`` array of consumer coordinates.
+        store_positions: ``(n_stores, 2)`` array of store coordinates.
+        prices: ``(n_stores,)`` array of store prices.
+        preference: "default", "proximity" or "price".
+        rng: numpy random generator used to break ties, usually ``model.rng``.
+
+    Returns:
+        The index of the preferred store of every consumer, the number of
+        consumers preferring each store, and the score matrix they are based on.
+    """
+    scores = score_matrix(consumer_positions, store_positions, prices, preference)
+    if scores.size == 0:
+        preferred = np.full(len(consumer_positions), -1)
+        return preferred, np.zeros(len(store_positions), dtype=int), scores
+    preferred = choose_stores(scores, rng)
+    market_shares = np.bincount(preferred, minlength=len(store_positions))
+    return preferred, market_shares, scores
+
+
+def competition_graph(scores, margin):
+    """Stores x stores matrix counting the consumers two stores compete for.
+
+    A consumer is contested by every store scoring within ``margin`` of its best
+    store; entry ``[i, j]`` is the number of consumers contested by both store ``i``
+    and store ``j``. With ``margin=0`` only consumers for whom both stores are tied
+    for best count. The diagonal is zero.
+    """
+    if scores.size == 0:
+        return np.zeros((scores.shape[1], scores.shape[1]), dtype=int)
+    contested = (scores <= scores.min(axis=1, keepdims=True) + margin).astype(int)
+    adjacency = contested.T @ contested
+    np.fill_diagonal(adjacency, 0)
+    return adjacency
+
+
+def _window_sum(values, radius, axis, torus):
+    """Sum over ``[i - radius, i + radius]`` along ``axis`` from a cumulative sum."""
+    size = values.shape[axis]
+    if torus and 2 * radius + 1 >= size:
+        # The window wraps around and covers every cell of the axis exactly once
+        total = values.sum(axis=axis, keepdims=True)
+        return np.repeat(total, size, axis=axis)
+
+    pad = [(0, 0)] * values.ndim
+    # One extra leading cell so that window i is cumulative[i + 2r + 1] - cumulative[i]
+    pad[axis] = (radius + 1, radius)
+    padded = np.pad(values, pad, mode="wrap" if torus else "constant")
+    cumulative = np.cumsum(padded, axis=axis)
+    upper = np.take(cumulative, np.arange(2 * radius + 1, 2 * radius + 1 + size), axis)
+    lower = np.take(cumulative, np.arange(size), axis)
+    return upper - lower
+
+
+def neighborhood_counts(density, radius, torus=True):
+    """Number of consumers in the Moore neighborhood of every cell.
+
+    The same count as ``len(cell.get_neighborhood(radius).agents)`` (which excludes
+    the cell itself), for all cells at once: a box sum over the density raster,
+    taken as a separable summed-area table, minus the cell's own consumers.
+    """
+    counts = density
+    for axis in range(density.ndim):
+        counts = _window_sum(counts, radius, axis, torus)
+    return counts - density
@@ -6,6 +6,13 @@ from mesa.datacollection import DataCollector
 from mesa.experimental.cell_space import OrthogonalMooreGrid
 
 from .agents import ConsumerAgent, StoreAgent
+from .market import (
+    MARKET_RADIUS,
+    assign_consumers,
+    competition_graph,
+    neighborhood_counts,
+)
+from .store_state import StoreStateTable
 
 
 # The main model class that sets up and runs the simulation.
@@ -49,6 +56,10 @@ class HotellingModel(Model):
         can change their locations if the operation mode permits movement.
         This allows for the exploration of market dynamics under
         varying degrees of agent mobility.
+        competition_margin (float): A consumer is contested by every store
+        whose score (distance and/or price) is within this margin of the
+        consumer's preferred store. Stores sharing contested consumers are
+        competitors, see ``competitors_of``.
 
     Key Components:
         HotellingModel: The class encapsulating the simulation environment,
@@ -74,6 +85,7 @@ class HotellingModel(Model):
         consumer_preferences="default",
         environment_type="grid",
         mobility_rate=80,
+        competition_margin=1.0,
         seed=None,
     ):
         # Initialize the model with parameters for number of agents,
@@ -92,6 +104,8 @@ class HotellingModel(Model):
         self.consumer_preferences = consumer_preferences
         # Type of environment ('grid' or 'line').
         self.environment_type = environment_type
+        # Score difference within which stores compete for a consumer.
+        self.competition_margin = competition_margin
 
         # Initialize the spatial grid based on the specified environment type.
         if environment_type == "grid":
@@ -103,78 +117,42 @@ class HotellingModel(Model):
                 (1, height), torus=True, random=self.random
             )  # A grid representing a line (single occupancy per cell).
 
+        # Consumer positions and the market estimate derived from them are cached
+        # until a consumer moves, see ``consumers_moved``
+        self._consumer_positions = None
+        self._market_estimate = None
         self._initialize_agents()
+        # Index of the preferred store of each consumer, into ``stores``,
+        # updated once per step by ``recalculate_market_share``
+        self.preferred_store_index = None
 
-        # Define model-level reporters
-        model_reporters = {"Price Variance": self.compute_price_variance}
-
-        # Dynamically generate store-specific price collectors
-        store_price_collectors = {
-            f"Store_{i}_Price": self.get_store_price_lambda(i) for i in range(n_stores)
-        }
-
-        # Dynamically generate store-specific market_share collectors
-        store_market_share_collectors = {
-            f"Store_{i}_Market Share": self.get_market_share_lambda(i)
-            for i in range(n_stores)
-        }
-
-        # Dynamically generate store-specific revenue collectors
-        store_revenue_collectors = {
-            f"Store_{i}_Revenue": self.get_revenue_lambda(i) for i in range(n_stores)
-        }
-
-        # Combine the dictionaries and pass them to DataCollector
-        all_reporters = {
-            **model_reporters,
-            **store_price_collectors,
-            **store_market_share_collectors,
-            **store_revenue_collectors,
-        }
-        self.datacollector = DataCollector(model_reporters=all_reporters)
-
-    @staticmethod
-    def get_store_price_lambda(unique_id):
-        """Return a lambda function that gets the
-        price of a store by its unique ID.
-        """
-        return lambda m: next(
-            (
-                agent.price
-                for agent in m.agents_by_type[StoreAgent]
-                if agent.unique_id == unique_id
-            ),
-            0,
-        )
+        # Stores never change, so their order is fixed once for the store table
+        # and the competition graph
+        self.stores = sorted(self.agents_by_type[StoreAgent], key=lambda s: s.unique_id)
+        self._store_index = {store: i for i, store in enumerate(self.stores)}
+        # Consumers contested by each pair of stores, see ``recalculate_market_share``
+        self.competition = np.zeros((len(self.stores), len(self.stores)), dtype=int)
+        # Prices, market shares and revenues of all stores, one snapshot per step
+        self.store_state = StoreStateTable([store.unique_id for store in self.stores])
 
-    @staticmethod
-    def get_market_share_lambda(unique_id):
-        """Return a lambda function that gets the
-        market_share of a store by its unique ID.
-        """
-        return lambda m: next(
-            (
-                agent.market_share
-                for agent in m.agents_by_type[StoreAgent]
-                if agent.unique_id == unique_id
-            ),
-            0,
+        self.datacollector = DataCollector(
+            model_reporters={"Price Variance": self.compute_price_variance}
         )
 
-    @staticmethod
-    def get_revenue_lambda(unique_id):
-        """Return a lambda function that calculates the
-        revenue of a store by its unique ID.
-        """
-        return lambda m: next(
-            (
-                agent.market_share * agent.price
-                for agent in m.agents_by_type[StoreAgent]
-                if agent.unique_id == unique_id
-            ),
-            0,
+    def collect_store_state(self):
+        """Record the prices and market shares of all stores in ``store_state``."""
+        self.store_state.record(
+            self.steps,
+            [store.price for store in self.stores],
+            [store.market_share for store in self.stores],
         )
 
+    def get_store_state_dataframe(self, tidy=False):
+        """Store history as a wide DataFrame, or a long one if ``tidy`` is set."""
+        if tidy:
+            return self.store_state.to_long()
+        return self.store_state.to_wide()
+
     # initialize and place agents on the grid.
     def _initialize_agents(self):
         num_mobile_agents = int(
@@ -202,26 +180,89 @@ class HotellingModel(Model):
                 self.grid.all_cells.select_random_cell(),
                 self.consumer_preferences,
             )
+        # Consumers don't move on their own, so this is the only place where the
+        # cached consumer positions go stale
+        self.consumers_moved()
 
     # Method to advance the simulation by one step.
     def step(self):
         """Advance the model by one step."""
         # Collect data for the current step.
         self.datacollector.collect(self)
+        self.collect_store_state()
         # Activate all agents in random order
         self.agents.shuffle_do("step")
         # Update market dynamics based on the latest actions
         self.recalculate_market_share()
 
+    def consumers_moved(self):
+        """Drop the cached consumer positions.
+
+        Call this after placing, moving or removing consumers.
+        """
+        self._consumer_positions = None
+        self._market_estimate = None
+
+    @property
+    def consumer_positions(self):
+        """Coordinates of all consumers, in the order of ``agents_by_type``."""
+        if self._consumer_positions is None:
+            self._consumer_positions = np.array(
+                [c.cell.coordinate for c in self.agents_by_type[ConsumerAgent]],
+                dtype=int,
+            ).reshape(-1, 2)
+        return self._consumer_positions
+
+    @property
+    def consumer_density(self):
+        """Number of consumers on every cell of the grid."""
+        density = np.zeros(self.grid.dimensions, dtype=int)
+        np.add.at(density, tuple(self.consumer_positions.T), 1)
+        return density
+
+    @property
+    def market_estimate(self):
+        """Consumers within ``MARKET_RADIUS`` of every cell of the grid."""
+        if self._market_estimate is None:
+            self._market_estimate = neighborhood_counts(
+                self.consumer_density, MARKET_RADIUS, torus=self.grid.torus
+            )
+        return self._market_estimate
+
     def recalculate_market_share(self):
-        # Reset market share for all stores directly
-        for store in self.agents_by_type[StoreAgent]:
-            store.market_share = 0
+        """Assign every consumer to its preferred store and update market shares.
+
+        All consumer/store scores are computed at once (see ``market.py``); the
+        result is stored on the stores and consumers, so nobody has to recompute it
+        during the step.
+        """
+        stores = self.stores
+        consumers = list(self.agents_by_type[ConsumerAgent])
+        preferred, market_shares, scores = assign_consumers(
+            self.consumer_positions,
+            np.array([s.cell.coordinate for s in stores]).reshape(-1, 2),
+            np.array([s.price for s in stores], dtype=float),
+            self.consumer_preferences,
+            self.rng,
+        )
+        self.preferred_store_index = preferred
+        self.competition = competition_graph(scores, self.competition_margin)
 
-        for consumer in self.agents_by_type[ConsumerAgent]:
-            preferred_store = consumer.determine_preferred_store()
-            if preferred_store:
-                preferred_store.market_share += 1
+        for store, market_share in zip(stores, market_shares):
+            store.market_share = int(market_share)
+        for consumer, index in zip(consumers, preferred):
+            consumer.preferred_store = stores[index] if index >= 0 else None
+
+    def competitors_of(self, store):
+        """Stores sharing contested consumers with ``store`` in the last step."""
+        row = self.competition[self._store_index[store]]
+        return [self.stores[i] for i in np.flatnonzero(row)]
+
+    def market_overlap(self, store, other_store):
+        """Number of consumers contested by both stores in the last step."""
+        return int(
+            self.competition[self._store_index[store], self._store_index[other_store]]
+        )
 
     # Utility method to run the model for a specified number of steps.
     def run_model(self, step_count=200):
@@ -237,6 +278,9 @@ class HotellingModel(Model):
         # Adjust the file paths if necessary to match your project structure
         model_data.to_csv("output/model_data.csv")
         agent_data.to_csv("output/agent_data.csv")
+        self.get_store_state_dataframe(tidy=True).to_csv(
+            "output/store_data.csv", index=False
+        )
 
     # Function to compute the average price of all store agents in the model.
     def compute_average_price(self):
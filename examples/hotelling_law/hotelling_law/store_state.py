@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+
+class StoreStateTable:
+    """Per-step prices, market shares and revenues of all stores, stored by column.
+
+    Each call to ``record`` adds one row per quantity, indexed by the position of a
+    store in ``store_ids``. The history can be read back as a wide DataFrame, with
+    one ``Store_<id>_<quantity>`` column per store like the reporters this table
+    replaces, or as a long (tidy) table with one row per step and store.
+    """
+
+    COLUMNS = ("Price", "Market Share", "Revenue")
+
+    def __init__(self, store_ids):
+        self.store_ids = np.asarray(store_ids)
+        self.steps = []
+        self.prices = []
+        self.market_shares = []
+
+    def record(self, step, prices, market_shares):
+        """Add a snapshot; ``prices`` and ``market_shares`` follow ``store_ids``."""
+        self.steps.append(step)
+        self.prices.append(np.asarray(prices, dtype=float))
+        self.market_shares.append(np.asarray(market_shares, dtype=int))
+
+    def as_arrays(self):
+        """``steps x stores`` arrays of price, market share and revenue."""
+        shape = (len(self.steps), len(self.store_ids))
+        prices = np.array(self.prices).reshape(shape)
+        market_shares = np.array(self.market_shares, dtype=int).reshape(shape)
+        return prices, market_shares, prices * market_shares
+
+    def to_wide(self):
+        """One row per step, one ``Store_<id>_<quantity>`` column per store."""
+        index = pd.Index(self.steps, name="Step")
+        frames = [
+            pd.DataFrame(
+                values,
+                index=index,
+                columns=[f"Store_{i}_{column}" for i in self.store_ids],
+            )
+            for column, values in zip(self.COLUMNS, self.as_arrays())
+        ]
+        return pd.concat(frames, axis=1)
+
+    def to_long(self):
+        """One row per step and store, with Step, Store and one column per quantity."""
+        num_steps, num_stores = len(self.steps), len(self.store_ids)
+        data = {
+            "Step": np.repeat(self.steps, num_stores),
+            "Store": np.tile(self.store_ids, num_steps),
+        }
+        for column, values in zip(self.COLUMNS, self.as_arrays()):
+            data[column] = values.ravel()
+        return pd.DataFrame(data)
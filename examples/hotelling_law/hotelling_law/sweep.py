@@ -0,0 +1,159 @@
+"""Headless parameter sweeps of the HotellingModel.
+
+Every combination of the swept parameters is run for a number of replicates, each
+with its own seed spawned from one base ``SeedSequence``, in a pool of worker
+processes. Each worker writes the per-step results of its run straight into one
+Parquet dataset partitioned by the swept parameters, so the parent process never
+holds more than a small summary per run.
+
+Run from the ``hotelling_law`` example directory, e.g.::
+
+    python -m hotelling_law.sweep --replicates 10 --steps 100 --output sweep_data
+
+The dataset can be read back with ``pandas.read_parquet("sweep_data")`` or
+``pyarrow.dataset.dataset("sweep_data", partitioning="hive")``.
+"""
+
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .model import HotellingModel
+
+# Values swept by default
+DEFAULT_SWEEP = {
+    "mode": ["default", "pricing_only", "moving_only"],
+    "consumer_preferences": ["default", "proximity", "price"],
+    "environment_type": ["grid", "line"],
+    "mobility_rate": [20, 80],
+    "n_stores": [5, 20],
+}
+
+
+def parameter_grid(sweep):
+    """All combinations of the values in ``sweep``, as a list of parameter dicts."""
+    names = list(sweep)
+    return [dict(zip(names, values)) for values in itertools.product(*sweep.values())]
+
+
+def make_runs(sweep, replicates, seed=0):
+    """One ``(run_id, params, replicate, seed)`` entry per configuration and replicate.
+
+    Seeds are spawned from a single ``SeedSequence``, so replicates are independent
+    and the whole sweep is reproducible from ``seed``.
+    """
+    configurations = parameter_grid(sweep)
+    seeds = np.random.SeedSequence(seed).spawn(len(configurations) * replicates)
+    runs = []
+    for run_id, (params, replicate) in enumerate(
+        itertools.product(configurations, range(replicates))
+    ):
+        runs.append(
+            (run_id, params, replicate, int(seeds[run_id].generate_state(1)[0]))
+        )
+    return runs
+
+
+def run_results(model):
+    """Per-step results of a model: one row per step and store."""
+    stores = model.get_store_state_dataframe(tidy=True)
+    model_vars = model.datacollector.get_model_vars_dataframe()
+    model_vars["Step"] = model.store_state.steps
+    return stores.merge(model_vars, on="Step")
+
+
+def run_and_write(run, output, steps, fixed_params, partition_cols):
+    """Run one replicate and append its results to the dataset at ``output``."""
+    run_id, params, replicate, seed = run
+    model = HotellingModel(**fixed_params, **params, seed=seed)
+    model.run_model(step_count=steps)
+
+    results = run_results(model)
+    results.insert(0, "run_id", run_id)
+    results.insert(1, "replicate", replicate)
+    results.insert(2, "seed", seed)
+    for name, value in params.items():
+        results[name] = value
+
+    pq.write_to_dataset(
+        pa.Table.from_pandas(results, preserve_index=False),
+        root_path=output,
+        partition_cols=partition_cols,
+        basename_template=f"run-{run_id}-{{i}}.parquet",
+    )
+    return {"run_id": run_id, "replicate": replicate, "seed": seed, **params}
+
+
+def run_sweep(
+    output,
+    sweep=None,
+    replicates=5,
+    steps=100,
+    seed=0,
+    max_workers=None,
+    chunksize=1,
+    **fixed_params,
+):
+    """Run a parameter sweep and write all per-step results to a Parquet dataset.
+
+    Args:
+        output: Directory of the Parquet dataset, partitioned by the swept parameters.
+        sweep: Parameter name -> list of values, defaults to ``DEFAULT_SWEEP``.
+        replicates: Number of runs per parameter combination.
+        steps: Number of steps per run.
+        seed: Base seed all run seeds are spawned from.
+        max_workers: Number of worker processes, defaults to the number of CPUs.
+        chunksize: Number of runs handed to a worker at once.
+        **fixed_params: Model parameters shared by all runs, e.g. ``n_consumers``.
+
+    Returns:
+        A DataFrame with the run id, replicate, seed and parameters of every run.
+    """
+    sweep = DEFAULT_SWEEP if sweep is None else sweep
+    runs = make_runs(sweep, replicates, seed)
+    partition_cols = list(sweep)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        summaries = list(
+            executor.map(
+                run_and_write,
+                runs,
+                itertools.repeat(os.fspath(output)),
+                itertools.repeat(steps),
+                itertools.repeat(fixed_params),
+                itertools.repeat(partition_cols),
+                chunksize=chunksize,
+            )
+        )
+    return pd.DataFrame(summaries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter sweep of HotellingModel")
+    parser.add_argument("--output", default="output/sweep")
+    parser.add_argument("--replicates", type=int, default=5)
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=1)
+    args = parser.parse_args()
+
+    runs = run_sweep(
+        args.output,
+        replicates=args.replicates,
+        steps=args.steps,
+        seed=args.seed,
+        max_workers=args.workers,
+        chunksize=args.chunksize,
+    )
+    print(f"Wrote {len(runs)} runs to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from scipy.stats import linregress
 
+from .hotelling_law.agents import ConsumerAgent, StoreAgent
 from .hotelling_law.model import HotellingModel
 
 
@@ -59,3 +60,73 @@ def test_constant_price_variance():
     assert get_slope(df_model["Price Variance"]) == 0, (
         "The price variance constant over time."
     )
+
+
+def test_vectorized_assignment_picks_best_store():
+    """Every consumer is assigned to one of its best scoring stores,
+    and market shares count those assignments.
+    """
+    model = HotellingModel(n_stores=10, n_consumers=200, width=20, height=20, seed=1)
+    model.run_model(step_count=3)
+
+    stores = list(model.agents_by_type[StoreAgent])
+    for consumer in model.agents_by_type[ConsumerAgent]:
+        scores = [
+            store.price
+            + consumer.euclidean_distance(
+                consumer.cell.coordinate, store.cell.coordinate
+            )
+            for store in stores
+        ]
+        chosen = stores.index(consumer.preferred_store)
+        assert scores[chosen] == min(scores)
+
+    assert sum(store.market_share for store in stores) == 200
+
+
+def test_market_estimate_matches_neighborhood():
+    """The consumer raster gives the same market estimate as walking
+    the radius 8 neighborhood of every cell.
+    """
+    model = HotellingModel(n_stores=5, n_consumers=300, width=12, height=30, seed=3)
+
+    for cell in model.grid.all_cells:
+        nearby_consumers = [
+            agent
+            for agent in cell.get_neighborhood(radius=8).agents
+            if isinstance(agent, ConsumerAgent)
+        ]
+        assert model.market_estimate[cell.coordinate] == len(nearby_consumers)
+
+
+def test_competition_graph_counts_contested_consumers():
+    """Two stores overlap by the consumers for whom both score within
+    the competition margin of the best store.
+    """
+    model = HotellingModel(
+        n_stores=6, n_consumers=100, width=20, height=20, competition_margin=2.0, seed=2
+    )
+    model.run_model(step_count=2)
+
+    stores = model.stores
+    contested = {store: set() for store in stores}
+    for consumer in model.agents_by_type[ConsumerAgent]:
+        scores = {
+            store: store.price
+            + consumer.euclidean_distance(
+                consumer.cell.coordinate, store.cell.coordinate
+            )
+            for store in stores
+        }
+        best = min(scores.values())
+        for store, score in scores.items():
+            if score <= best + 2.0:
+                contested[store].add(consumer)
+
+    for store in stores:
+        for other in stores:
+            if other is store:
+                continue
+            shared = len(contested[store] & contested[other])
+            assert store.estimate_market_overlap(other) == shared
+            assert (other in store.identify_competitors()) == (shared > 0)